@@ -1,9 +1,15 @@
+import asyncio
 import json
-from typing import Dict, List, Literal, Union
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
-import requests
+import aiohttp
 
-from database.db import get_token_from_tokens_table, get_info_for_stats, insert_record_to_tokens_table, get_avito_id
+from avito_api.stats_aggregation import (STATS_DATE_FORMAT, SUMMED_PERIODS, AvitoPeriod, StatsPeriod,
+                                         aggregate_daily_rows, rows_to_items)
+from database.db import (insert_record_to_tokens_table, get_all_companies_info, get_item_stats, get_item_stats_days,
+                         save_item_stats)
 from log_settings.logger_init import logger
 
 
@@ -18,7 +24,6 @@ HEADERS = {
 HEADERS_TO_GET_TOKEN = {'Content-Type': 'application/x-www-form-urlencoded'}
 
 URL_TO_GET_TOKEN = 'https://api.avito.ru/token/'
-URL_TO_ITEM = 'https://api.avito.ru/core/v1/accounts/{user_id}/items/{item_id}/'
 URL_TO_ITEMS = 'https://api.avito.ru/core/v1/items'
 URL_TO_ITEMS_STATS = 'https://api.avito.ru/stats/v1/accounts/{user_id}/items'
 URL_TO_AUTOLOAD_GET_LAST_COMPLETED_REPORT = 'https://api.avito.ru/autoload/v2/reports/last_completed_report'
@@ -27,59 +32,248 @@ DATA_TO_GET_TOKEN = {
     'grant_type': 'client_credentials'
 }
 
+# Настройки пула соединений и таймаутов (в секундах)
+CONNECTIONS_LIMIT = 20
+CONNECTIONS_LIMIT_PER_HOST = 10
+SESSION_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10)
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+STATS_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10)
 
-def get_updated_token(client_id: str, client_secret: str):
-    data = DATA_TO_GET_TOKEN
-    data['client_id'] = client_id
-    data['client_secret'] = client_secret
-    response = requests.post(URL_TO_GET_TOKEN, headers=HEADERS_TO_GET_TOKEN, data=data)
-    content: Dict = json.loads(response.content)
-    return content.get('access_token')
+# За сколько секунд до истечения токена его нужно обновить
+TOKEN_REFRESH_MARGIN = 600
+# Срок жизни токена, если Авито его не прислал
+DEFAULT_TOKEN_EXPIRES_IN = 24 * 60 * 60
+# Сколько раз повторить запрос с новым токеном после ответа 401/403
+MAX_AUTH_RETRIES = 1
+AUTH_ERROR_STATUSES = (401, 403)
+# Минимальный интервал между запросами к API одного аккаунта, в секундах
+ACCOUNT_MIN_REQUEST_INTERVAL = 0.2
+# Ограничения API: объявлений на странице списка и объявлений в одном запросе статистики
+ITEMS_PER_PAGE = 100
+STATS_ITEMS_PER_REQUEST = 200
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Вернет общую для всех запросов к Авито сессию.
+    Сессия создается лениво внутри работающего event loop и переиспользует соединения из пула.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=CONNECTIONS_LIMIT, limit_per_host=CONNECTIONS_LIMIT_PER_HOST)
+        _session = aiohttp.ClientSession(connector=connector, timeout=SESSION_TIMEOUT)
+    return _session
+
+
+async def close_session() -> None:
+    """Закроет общую сессию. Вызывается при остановке бота."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
 
 
-def get_items_list_info(company_name: str) -> Dict:
-    token = get_token_from_tokens_table(company_name=company_name)
-    headers = {
+def create_headers(token: Optional[str]) -> Dict:
+    return {
         'Authorization':
             f'Bearer {token}',
         'Content-Type': 'application/json'
     }
-    response = requests.get(url=URL_TO_ITEMS, headers=headers)
-    data = json.loads(response.content)
 
-    if response.status_code == 200:
-        return data
-    elif response.status_code == 403:
-        avito_id, client_id, client_secret = get_info_for_stats(company_name=company_name)
-        new_token = get_updated_token(client_id=client_id, client_secret=client_secret)
-        insert_record_to_tokens_table(avito_id=avito_id, token=new_token)
 
-        return get_items_list_info(company_name=company_name)
+async def get_updated_token(client_id: str, client_secret: str) -> Tuple[Optional[str], Optional[int]]:
+    """Вернет новый токен и срок его жизни в секундах."""
+    data = dict(DATA_TO_GET_TOKEN)
+    data['client_id'] = client_id
+    data['client_secret'] = client_secret
+    try:
+        async with get_session().post(URL_TO_GET_TOKEN, headers=HEADERS_TO_GET_TOKEN, data=data,
+                                      timeout=REQUEST_TIMEOUT) as response:
+            content: Dict = json.loads(await response.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+        logger.warning(msg=f'Ошибка при получении токена: {exc}')
+        return None, None
+    return content.get('access_token'), content.get('expires_in')
+
+
+class TokenManager:
+    """
+    Хранит токены Авито вместе со сроком жизни и обновляет их в фоне заранее, до истечения.
+    Одновременные обновления токена одного аккаунта сводятся к одному вызову get_updated_token.
+    """
+
+    def __init__(self, refresh_margin: float = TOKEN_REFRESH_MARGIN) -> None:
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[int, Tuple[str, float]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._refresh_tasks: Dict[int, asyncio.Task] = {}
+
+    def _is_fresh(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and time.time() < expires_at - self.refresh_margin
+
+    def _remember(self, company: Dict) -> Optional[Tuple[str, float]]:
+        """Вернет известный токен аккаунта, при необходимости взяв его из строки справочника."""
+        avito_id = company.get('avito_id')
+        if avito_id not in self._tokens and company.get('token') and company.get('expires_at'):
+            self._tokens[avito_id] = (company['token'], company['expires_at'])
+        return self._tokens.get(avito_id)
+
+    async def get_token(self, company: Dict) -> Optional[str]:
+        known = self._remember(company)
+        if known and self._is_fresh(known[1]):
+            company['token'], company['expires_at'] = known
+            return known[0]
+        return await self.refresh(company, stale_token=known[0] if known else company.get('token'))
+
+    async def refresh(self, company: Dict, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Обновит токен аккаунта. stale_token - токен, который перестал подходить:
+        если его уже заменили в параллельном вызове, повторного обращения к Авито не будет.
+        """
+        avito_id = company.get('avito_id')
+        lock = self._locks.setdefault(avito_id, asyncio.Lock())
+        async with lock:
+            known = self._tokens.get(avito_id)
+            if known and known[0] != stale_token and self._is_fresh(known[1]):
+                company['token'], company['expires_at'] = known
+                return known[0]
+            # Токен мог обновить другой процесс бота, тогда он уже есть в строке справочника
+            if company.get('token') not in (None, stale_token) and self._is_fresh(company.get('expires_at')):
+                self._tokens[avito_id] = (company['token'], company['expires_at'])
+                return company['token']
+
+            token, expires_in = await get_updated_token(
+                client_id=company.get('client_id'), client_secret=company.get('client_secret')
+            )
+            if token is None:
+                logger.warning(msg=f'Не удалось обновить токен для Avito ID {avito_id}')
+                return None
+            expires_at = time.time() + (expires_in or DEFAULT_TOKEN_EXPIRES_IN)
+            self._tokens[avito_id] = (token, expires_at)
+            company['token'], company['expires_at'] = token, expires_at
+            await insert_record_to_tokens_table(avito_id=avito_id, token=token, expires_at=expires_at)
+            self.schedule_refresh(company=company, expires_at=expires_at)
+            return token
+
+    def schedule_refresh(self, company: Dict, expires_at: float) -> None:
+        """Запланирует фоновое обновление токена незадолго до его истечения."""
+        avito_id = company.get('avito_id')
+        task = self._refresh_tasks.pop(avito_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        self._refresh_tasks[avito_id] = asyncio.create_task(self._refresh_later(dict(company), expires_at))
+
+    async def _refresh_later(self, company: Dict, expires_at: float) -> None:
+        await asyncio.sleep(max(expires_at - self.refresh_margin - time.time(), 0))
+        try:
+            await self.refresh(company, stale_token=company.get('token'))
+        except Exception as exc:
+            logger.warning(msg=f'Ошибка при фоновом обновлении токена: {exc}')
+
+    async def start(self) -> None:
+        """Запланирует обновление всех токенов, срок жизни которых известен."""
+        for company in (await get_all_companies_info()).values():
+            if company.get('token') and company.get('expires_at'):
+                self._remember(company)
+                self.schedule_refresh(company=company, expires_at=company['expires_at'])
+
+    async def close(self) -> None:
+        for task in self._refresh_tasks.values():
+            task.cancel()
+        self._refresh_tasks.clear()
+
+
+token_manager = TokenManager()
+
+
+class AccountRateLimiter:
+    """Выдерживает минимальный интервал между запросами к API одного аккаунта Авито."""
+
+    def __init__(self, min_interval: float = ACCOUNT_MIN_REQUEST_INTERVAL) -> None:
+        self.min_interval = min_interval
+        self._next_slot: Dict[int, float] = {}
+
+    async def wait(self, avito_id: int) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(avito_id, now))
+        self._next_slot[avito_id] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+rate_limiter = AccountRateLimiter()
+
+
+async def request_with_token(company: Dict, method: str, url: str, **kwargs) -> Tuple[int, bytes]:
+    """
+    Выполнит запрос с актуальным токеном аккаунта.
+    При ответе 401/403 токен обновится, а запрос повторится не более MAX_AUTH_RETRIES раз.
+    """
+    token = await token_manager.get_token(company)
+    attempt = 0
+    while True:
+        await rate_limiter.wait(company.get('avito_id'))
+        async with get_session().request(method, url, headers=create_headers(token=token), **kwargs) as response:
+            status = response.status
+            content = await response.read()
+        if status not in AUTH_ERROR_STATUSES or attempt >= MAX_AUTH_RETRIES:
+            return status, content
+        attempt += 1
+        token = await token_manager.refresh(company, stale_token=token)
+        if token is None:
+            return status, content
+
+
+async def get_items_list_info(company: Dict, page: int = 1, per_page: int = ITEMS_PER_PAGE) -> Optional[Dict]:
+    """
+    Вернет одну страницу списка объявлений.
+    company - строка из справочника клиентов (customers вместе с токеном из tokens),
+    такие же словари принимают и остальные функции модуля.
+    """
+    params = {'page': page, 'per_page': per_page}
+    try:
+        status, content = await request_with_token(company, 'GET', URL_TO_ITEMS, params=params,
+                                                   timeout=REQUEST_TIMEOUT)
+        data = json.loads(content)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+        logger.warning(msg=f'Ошибка при получении списка объявлений: {exc}')
+        return None
+
+    if status == 200:
+        return data
     else:
-        logger.info(msg=f'Неизвестный доселе код ответа: {response.status_code}')
+        logger.info(msg=f'Неизвестный доселе код ответа: {status}')
 
 
-def get_item_info(item_id: int, user_id: int):
-    response = requests.get(url=URL_TO_ITEM.format(user_id=user_id, item_id=item_id), headers=HEADERS)
-    return response.content
+async def get_all_items_list_info(company: Dict) -> Optional[List[Dict]]:
+    """Пройдет по всем страницам списка объявлений и вернет их одним списком."""
+    resources = []
+    page = 1
+    while True:
+        data = await get_items_list_info(company=company, page=page)
+        if data is None:
+            return None
+        page_resources = data.get('resources') or []
+        resources.extend(page_resources)
+        if len(page_resources) < ITEMS_PER_PAGE:
+            return resources
+        page += 1
 
 
-def get_items_id(company_name: str) -> List[int]:
-    data = get_items_list_info(company_name=company_name)
+async def get_items_id(company: Dict) -> List[int]:
+    data = await get_all_items_list_info(company=company)
     try:
-        id_list = [item_info.get('id') for item_info in data.get('resources')]
+        id_list = [item_info.get('id') for item_info in data]
         return id_list
     except Exception as exc:
         logger.info(msg=f'Ошибка: {exc}')
 
 
-def get_items_stats(company_name: str, date_from: str, date_to: str, period: Literal['week', 'month', 'year']) \
-        -> Union[Dict, str]:
-    user_id = get_avito_id(company_name=company_name)
-    items_ids = get_items_id(company_name=company_name)
-    token = get_token_from_tokens_table(company_name=company_name)
-    headers = HEADERS
-    headers['Authorization'] = headers['Authorization'].format(token=token)
+async def get_items_stats_chunk(company: Dict, items_ids: List[int], date_from: str, date_to: str,
+                                period: AvitoPeriod) -> Union[List, str, None]:
+    """Запросит статистику по части объявлений, не больше STATS_ITEMS_PER_REQUEST за раз."""
     data = {
         "dateFrom": date_from,
         "dateTo": date_to,
@@ -90,40 +284,138 @@ def get_items_stats(company_name: str, date_from: str, date_to: str, period: Lit
         "periodGrouping": period
     }
     dump_data = json.dumps(data)
-    response = requests.post(url=URL_TO_ITEMS_STATS.format(user_id=user_id), data=dump_data, headers=HEADERS)
-    if response.status_code == 200:
-        response = json.loads(response.content)
-        return response.get('result').get('items')
-    elif response.status_code == 403:
-        avito_id, client_id, client_secret = get_info_for_stats(company_name=company_name)
-        new_token = get_updated_token(client_id=client_id, client_secret=client_secret)
-        insert_record_to_tokens_table(avito_id=avito_id, token=new_token)
+    try:
+        status, content = await request_with_token(
+            company, 'POST', URL_TO_ITEMS_STATS.format(user_id=company.get('avito_id')), data=dump_data,
+            timeout=STATS_REQUEST_TIMEOUT
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        logger.warning(msg=f'Ошибка при получении статистики: {exc}')
+        return None
 
-        return get_items_stats(company_name=company_name, date_from=date_from, date_to=date_to, period=period)
+    if status == 200:
+        response = json.loads(content)
+        return response.get('result').get('items')
     else:
-        return response.content.decode(encoding='utf-8')
+        return content.decode(encoding='utf-8')
+
+
+async def fetch_items_stats(company: Dict, items_ids: List[int], date_from: str, date_to: str,
+                            period: AvitoPeriod) -> Union[List, str, None]:
+    """
+    Запросит у Авито статистику по объявлениям items_ids.
+    Объявления разбиваются на части по STATS_ITEMS_PER_REQUEST, части запрашиваются параллельно
+    и склеиваются в исходном порядке - результат такой же, как у одного большого запроса.
+    Если какая-то часть не получена, вернется ее ошибка.
+    """
+    chunks = [items_ids[start:start + STATS_ITEMS_PER_REQUEST]
+              for start in range(0, len(items_ids), STATS_ITEMS_PER_REQUEST)]
+    results = await asyncio.gather(*(
+        get_items_stats_chunk(company=company, items_ids=chunk, date_from=date_from, date_to=date_to,
+                              period=period)
+        for chunk in chunks
+    ))
+    items = []
+    for result in results:
+        if not isinstance(result, list):
+            return result
+        items.extend(result)
+    return items
+
+
+def find_missing_ranges(first_day: date, last_day: date, loaded_days: Set[str]) -> List[Tuple[date, date]]:
+    """Вернет непрерывные отрезки дней периода, которых нет среди загруженных."""
+    ranges = []
+    for offset in range((last_day - first_day).days + 1):
+        day = first_day + timedelta(days=offset)
+        if day.strftime(STATS_DATE_FORMAT) in loaded_days:
+            continue
+        if ranges and ranges[-1][1] == day - timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def iter_finished_days(ranges: Iterable[Tuple[date, date]]) -> Iterable[str]:
+    """Вернет дни отрезков, которые уже закончились: статистика за сегодня еще меняется."""
+    today = date.today()
+    for start, end in ranges:
+        day = start
+        while day <= end and day < today:
+            yield day.strftime(STATS_DATE_FORMAT)
+            day += timedelta(days=1)
 
 
-def insert_updated_token_to_db(company_name: str) -> None:
-    avito_id, client_id, client_secret = get_info_for_stats(company_name=company_name)
-    new_token = get_updated_token(client_id=client_id, client_secret=client_secret)
-    insert_record_to_tokens_table(avito_id=avito_id, token=new_token)
+async def get_daily_rows(company: Dict, date_from: str, date_to: str) -> Union[List, str, None]:
+    """
+    Вернет строки дневной статистики аккаунта из базы, догрузив из Авито только дни, которых там еще нет.
+    Строки (item_id, date, uniq_views, uniq_contacts, uniq_favorites) упорядочены по объявлению и дате.
+    """
+    avito_id = company.get('avito_id')
+    first_day, last_day = (datetime.strptime(value, STATS_DATE_FORMAT).date() for value in (date_from, date_to))
+    missing_ranges = find_missing_ranges(
+        first_day=first_day, last_day=last_day,
+        loaded_days=await get_item_stats_days(avito_id=avito_id, date_from=date_from, date_to=date_to)
+    )
+    if missing_ranges:
+        items_ids = await get_items_id(company=company)
+        if items_ids is None:
+            return None
+        results = await asyncio.gather(*(
+            fetch_items_stats(company=company, items_ids=items_ids, date_from=start.strftime(STATS_DATE_FORMAT),
+                              date_to=end.strftime(STATS_DATE_FORMAT), period='day')
+            for start, end in missing_ranges
+        ))
+        for result in results:
+            if not isinstance(result, list):
+                return result
+        rows = [
+            (item['itemId'], entry['date'], entry.get('uniqViews'), entry.get('uniqContacts'),
+             entry.get('uniqFavorites'))
+            for result in results for item in result for entry in item.get('stats') or []
+        ]
+        await save_item_stats(avito_id=avito_id, rows=rows, days=iter_finished_days(missing_ranges))
+        logger.info(msg=f'Статистика аккаунта {avito_id}: догружено отрезков {len(missing_ranges)}, '
+                        f'строк {len(rows)}')
 
+    return await get_item_stats(avito_id=avito_id, date_from=date_from, date_to=date_to)
 
-def get_autoload_last_completed_report(company_name: str) -> Dict:
-    token = get_token_from_tokens_table(company_name=company_name)
-    headers = {'Authorization': f'Bearer {token}'}
+
+async def get_items_stats(company: Dict, date_from: str, date_to: str,
+                          period: StatsPeriod) -> Union[List, str]:
+    """
+    Вернет статистику по всем объявлениям аккаунта в формате ответа Авито.
+    Дневная статистика берется из базы, из Авито запрашиваются только дни, которых там еще нет.
+    Недели и месяцы запрашиваются у Авито: уникальные значения за период не складываются из дневных.
+    Годы (SUMMED_PERIODS) Авито не группирует, они складываются из дневных строк локально.
+    """
+    if period != 'day' and period not in SUMMED_PERIODS:
+        items_ids = await get_items_id(company=company)
+        if items_ids is None:
+            return None
+        return await fetch_items_stats(company=company, items_ids=items_ids, date_from=date_from, date_to=date_to,
+                                       period=period)
+    rows = await get_daily_rows(company=company, date_from=date_from, date_to=date_to)
+    if not isinstance(rows, list):
+        return rows
+    if period == 'day':
+        return rows_to_items(rows)
+    return aggregate_daily_rows(rows=rows, period=period)
+
+
+async def get_autoload_last_completed_report(company: Dict) -> Optional[Dict]:
     url = URL_TO_AUTOLOAD_GET_LAST_COMPLETED_REPORT
-    response = requests.get(url=url, headers=headers)
-    data = json.loads(response.content)
-    if response.status_code == 200:
+    try:
+        status, content = await request_with_token(company, 'GET', url, timeout=REQUEST_TIMEOUT)
+        data = json.loads(content)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+        logger.warning(msg=f'Ошибка при получении отчета по автозагрузке: {exc}')
+        return None
+    if status == 200:
         return data
-    elif response.status_code == 403:
-        try:
-            insert_updated_token_to_db(company_name=company_name)
-            return get_autoload_last_completed_report(company_name=company_name)
-        except Exception as exc:
-            logger.info(msg=f'Ошибка: {exc}')
+    else:
+        logger.info(msg=f'Не удалось получить отчет по автозагрузке, код ответа: {status}')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from avito_api.avito import get_items_stats
+from avito_api.stats_aggregation import StatsPeriod
+from database.db import get_all_companies_info
+from log_settings.logger_init import logger
+
+
+# Сколько аккаунтов опрашивается одновременно
+BULK_STATS_CONCURRENCY = 5
+
+
+class CompanyStats(NamedTuple):
+    title: str
+    # Список объявлений со статистикой, либо текст ошибки от Авито
+    items: Optional[Union[List, str]]
+    seconds: float
+
+
+async def collect_company_stats(company: dict, date_from: str, date_to: str,
+                                period: StatsPeriod, semaphore: asyncio.Semaphore) \
+        -> CompanyStats:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            items = await get_items_stats(company=company, date_from=date_from, date_to=date_to, period=period)
+        except Exception as exc:
+            logger.warning(msg=f'Ошибка при получении статистики клиента {company.get("title")}: {exc}')
+            items = str(exc)
+        return CompanyStats(title=company.get('title'), items=items, seconds=time.perf_counter() - started)
+
+
+async def collect_all_customers_stats(date_from: str, date_to: str, period: StatsPeriod = 'day',
+                                      concurrency: int = BULK_STATS_CONCURRENCY) -> Tuple[List[CompanyStats], float]:
+    """
+    Соберет статистику по всем клиентам из базы, опрашивая не более concurrency аккаунтов одновременно.
+    Вернет результаты по клиентам и общее время работы в секундах.
+    """
+    companies = await get_all_companies_info()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        collect_company_stats(company=company, date_from=date_from, date_to=date_to, period=period,
+                              semaphore=semaphore)
+        for company in companies.values()
+    ))
+    wall_clock = time.perf_counter() - started
+    sequential = sum(result.seconds for result in results)
+    logger.info(msg=f'Статистика по {len(results)} клиентам собрана за {wall_clock:.1f} с '
+                    f'(сумма по клиентам {sequential:.1f} с, параллельность {concurrency})')
+    return list(results), wall_clock
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List, Literal, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Колонки строк дневной статистики из базы и соответствующие им поля ответа Авито
+STATS_COLUMNS = ['item_id', 'date', 'uniq_views', 'uniq_contacts', 'uniq_favorites']
+VALUE_FIELDS = {'uniq_views': 'uniqViews', 'uniq_contacts': 'uniqContacts', 'uniq_favorites': 'uniqFavorites'}
+# Группировки, которые принимает periodGrouping Авито
+AvitoPeriod = Literal['day', 'week', 'month']
+# Группировки, которые умеет складывать aggregate_daily_rows
+AggregatedPeriod = Literal['week', 'month', 'year']
+# Все группировки, которые можно запросить у бота
+StatsPeriod = Literal['day', 'week', 'month', 'year']
+# Группировки, которых нет у Авито: их уникальные значения - суммы дневных, а не уникальные за весь период
+SUMMED_PERIODS = ('year', )
+# Частоты pandas для группировки: неделя начинается с понедельника, месяц и год - с первого числа
+PERIOD_FREQUENCIES = {'week': 'W-SUN', 'month': 'M', 'year': 'Y'}
+# Формат дат в запросах и ответах статистики
+STATS_DATE_FORMAT = '%Y-%m-%d'
+
+
+def rows_to_items(rows: Iterable[Sequence]) -> List[Dict]:
+    """
+    Соберет строки (item_id, date, uniq_views, uniq_contacts, uniq_favorites)
+    в формат ответа Авито: [{'itemId': ..., 'stats': [{'date': ..., 'uniqViews': ..., ...}, ...]}, ...].
+    Строки одного объявления попадают в одну запись, даже если идут не подряд; порядок строк сохраняется.
+    """
+    items: Dict[int, List[Dict]] = {}
+    for row in rows:
+        items.setdefault(row[0], []).append(
+            {'date': row[1], **{field: value for field, value in zip(VALUE_FIELDS.values(), row[2:])}}
+        )
+    return [{'itemId': item_id, 'stats': stats} for item_id, stats in items.items()]
+
+
+def aggregate_daily_rows(rows: Sequence, period: AggregatedPeriod) -> List[Dict]:
+    """
+    Сложит дневные строки статистики по неделям, месяцам или годам.
+    Дата корзины - ее первый день. Результат в формате ответа Авито, как у rows_to_items.
+    Корзина вычисляется один раз на каждый различный день, а не на каждую строку.
+
+    Уникальные просмотры, контакты и избранные складываются по дням, поэтому пользователь, который
+    заходил в разные дни, учтен несколько раз. Суммы больше тех, что Авито вернул бы для periodGrouping.
+    """
+    frame = pd.DataFrame.from_records([tuple(row) for row in rows], columns=STATS_COLUMNS)
+    if frame.empty:
+        return []
+    values = list(VALUE_FIELDS)
+    frame[values] = frame[values].fillna(0).astype('int64')
+    day_codes, days = pd.factorize(frame['date'])
+    buckets = (pd.to_datetime(days, format=STATS_DATE_FORMAT)
+               .to_period(PERIOD_FREQUENCIES[period])
+               .start_time
+               .strftime(STATS_DATE_FORMAT))
+    frame['date'] = np.asarray(buckets, dtype=object)[day_codes]
+    totals = frame.groupby(['item_id', 'date'], sort=True)[values].sum().reset_index()
+    return rows_to_items(totals[STATS_COLUMNS].itertuples(index=False, name=None))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,34 @@
+"""
+Время сбора статистики по всем клиентам из базы: последовательно и параллельно.
+Нужны настоящие клиенты в базе и доступ к API Авито.
+Перед каждым прогоном сохраненная статистика (item_stats, item_stats_days) удаляется,
+чтобы оба прогона запрашивали все дни у Авито, а не читали их из базы.
+
+Запуск из корня проекта:
+    python -m benchmarks.bulk_stats 2024-01-01 2024-01-31
+"""
+import asyncio
+import sys
+
+from avito_api.avito import close_session, token_manager
+from avito_api.bulk_stats import collect_all_customers_stats, BULK_STATS_CONCURRENCY
+from database.db import clear_item_stats, init_db, close_db
+
+
+async def main(date_from: str, date_to: str) -> None:
+    await init_db()
+    try:
+        for concurrency in (1, BULK_STATS_CONCURRENCY):
+            await clear_item_stats()
+            results, wall_clock = await collect_all_customers_stats(
+                date_from=date_from, date_to=date_to, concurrency=concurrency
+            )
+            print(f'параллельность {concurrency:>2}: клиентов {len(results)}, {wall_clock:.2f} с')
+    finally:
+        await token_manager.close()
+        await close_session()
+        await close_db()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*sys.argv[1:3]))
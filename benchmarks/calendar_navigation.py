@@ -0,0 +1,67 @@
+"""
+Сколько нажатий навигации по календарю в секунду выдерживает построение клавиатуры:
+каждый раз заново и из кэша отрисованных месяцев.
+
+Запуск из корня проекта:
+    python -m benchmarks.calendar_navigation 20000
+"""
+import asyncio
+import sys
+import time
+from datetime import date, datetime
+from typing import List, Tuple
+
+from changed_calendar.simple_calendar import SimpleCalendar, build_month_keyboard, cached_month_keyboard
+
+
+DATE_FROM = datetime(2020, 1, 1)
+DATE_TO = datetime(2040, 12, 31)
+
+
+def navigation_months(count: int) -> List[Tuple[int, int]]:
+    """Пользователи листают год назад и вперед от текущего месяца."""
+    today = date.today()
+    months = []
+    for shift in range(-12, 13):
+        index = today.year * 12 + today.month - 1 + shift
+        months.append((index // 12, index % 12 + 1))
+    return [months[i % len(months)] for i in range(count)]
+
+
+def create_calendar() -> SimpleCalendar:
+    calendar = SimpleCalendar()
+    calendar.set_dates_range(DATE_FROM, DATE_TO)
+    return calendar
+
+
+async def uncached_clicks(clicks: List[Tuple[int, int]]) -> float:
+    started = time.perf_counter()
+    for year, month in clicks:
+        calendar = create_calendar()
+        build_month_keyboard(
+            year=year, month=month, days_of_week=tuple(calendar._labels.days_of_week),
+            months=tuple(calendar._labels.months), cancel_caption=calendar._labels.cancel_caption,
+            today_caption=calendar._labels.today_caption, min_date=calendar.min_date, max_date=calendar.max_date,
+            today=date.today()
+        )
+    return time.perf_counter() - started
+
+
+async def cached_clicks(clicks: List[Tuple[int, int]]) -> float:
+    cached_month_keyboard.cache_clear()
+    started = time.perf_counter()
+    for year, month in clicks:
+        await create_calendar().start_calendar(year=year, month=month)
+    return time.perf_counter() - started
+
+
+async def main(count: int) -> None:
+    clicks = navigation_months(count)
+    for name, run in (('без кэша', uncached_clicks), ('с кэшем', cached_clicks)):
+        seconds = await run(clicks)
+        print(f'{name:<10} {count / seconds:10.0f} нажатий/с')
+    print(f'кэш: {cached_month_keyboard.cache_info()}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,101 @@
+"""
+Задержка ответа пользователю из-за удаления старых сообщений:
+общая очередь с последовательным удалением против удаления по чатам в фоне.
+Бот ненастоящий, каждый вызов API ждет FAKE_API_DELAY секунд.
+
+Запуск из корня проекта:
+    python -m benchmarks.cleaner_latency 50 5
+"""
+import asyncio
+import queue
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from aiogram.types import Chat, Message
+
+from bot_api.middlewares import ChatCleaner, CleanerMiddleware
+
+
+FAKE_API_DELAY = 0.03
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, method: Any, request_timeout: Any = None) -> bool:
+        self.calls += 1
+        await asyncio.sleep(FAKE_API_DELAY)
+        return True
+
+    async def delete_messages(self, chat_id: int, message_ids: List[int]) -> bool:
+        self.calls += 1
+        await asyncio.sleep(FAKE_API_DELAY)
+        return True
+
+
+class QueueCleanerMiddleware:
+    """Прежний вариант: одна очередь на всех, сообщения удаляются по одному до обработчика."""
+
+    def __init__(self) -> None:
+        self.queue = queue.Queue()
+
+    async def __call__(self, handler, event: Message, data: Dict[str, Any]) -> Any:
+        while not self.queue.empty():
+            event_to_be_cleaned = self.queue.get()
+            if isinstance(event_to_be_cleaned, Message) and event_to_be_cleaned.text != '/start':
+                await event_to_be_cleaned.delete()
+        self.queue.put(event)
+        result = await handler(event, data)
+        self.queue.put(result)
+        return result
+
+
+def make_message(bot: FakeBot, chat_id: int, message_id: int, text: str = 'текст') -> Message:
+    message = Message(message_id=message_id, date=datetime.now(),
+                      chat=Chat(id=chat_id, type='private'), text=text)
+    return message.as_(bot)
+
+
+async def simulate(middleware: Any, bot: FakeBot, chats: int, steps: int) -> List[float]:
+    latencies = []
+    message_ids = iter(range(1, 10 ** 9))
+
+    async def handler(event: Message, data: Dict[str, Any]) -> Message:
+        return make_message(bot=bot, chat_id=event.chat.id, message_id=next(message_ids))
+
+    async def user(chat_id: int) -> None:
+        for _ in range(steps):
+            event = make_message(bot=bot, chat_id=chat_id, message_id=next(message_ids))
+            start = time.perf_counter()
+            await middleware(handler, event, {'bot': bot, 'event_chat': event.chat})
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(user(chat_id) for chat_id in range(1, chats + 1)))
+    return latencies
+
+
+def report(name: str, latencies: List[float], bot: FakeBot) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{name:<20} среднее {statistics.mean(latencies) * 1000:8.1f} мс, '
+          f'p95 {p95 * 1000:8.1f} мс, вызовов API {bot.calls}')
+
+
+async def main(chats: int, steps: int) -> None:
+    bot = FakeBot()
+    report('общая очередь', await simulate(QueueCleanerMiddleware(), bot, chats, steps), bot)
+
+    bot = FakeBot()
+    cleaner = ChatCleaner()
+    latencies = await simulate(CleanerMiddleware(cleaner=cleaner), bot, chats, steps)
+    await cleaner.close()
+    report('по чатам в фоне', latencies, bot)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args or [50, 5])))
@@ -0,0 +1,75 @@
+"""
+Сравнение доступа к SQLite: новое соединение на каждый запрос против долгоживущего соединения.
+
+Запуск из корня проекта:
+    python -m benchmarks.db_connections
+"""
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from database.db import (ConnectionManager, CREATE_ADMINS_ID_TABLE_SQL, INSERT_ADMIN_SQL, GET_ADMIN_IDS_LIST,
+                         GET_IN_CHARGE_ADMIN_IDS_LIST_SQL)
+
+
+CALLS = 5000
+ADMINS = 50
+
+
+def per_call_connect(path: str) -> None:
+    for _ in range(CALLS):
+        with sqlite3.connect(path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(GET_ADMIN_IDS_LIST)
+        [admin_id[0] for admin_id in cursor.fetchall()]
+
+
+def pooled_sync(manager: ConnectionManager) -> None:
+    for _ in range(CALLS):
+        [admin_id[0] for admin_id in manager.fetchall_sync(GET_ADMIN_IDS_LIST)]
+
+
+async def pooled_async(manager: ConnectionManager) -> None:
+    for _ in range(CALLS):
+        [admin_id[0] for admin_id in await manager.fetchall(GET_ADMIN_IDS_LIST)]
+
+
+async def pooled_async_concurrent(manager: ConnectionManager) -> None:
+    await asyncio.gather(*(manager.fetchall(GET_IN_CHARGE_ADMIN_IDS_LIST_SQL) for _ in range(CALLS)))
+
+
+def report(name: str, seconds: float) -> None:
+    print(f'{name:<28} {seconds * 1000:9.1f} ms   {CALLS / seconds:10.0f} вызовов/с')
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.db')
+        manager = ConnectionManager(path)
+        manager.execute_sync(CREATE_ADMINS_ID_TABLE_SQL)
+        for admin_id in range(ADMINS):
+            manager.execute_sync(INSERT_ADMIN_SQL, (admin_id, f'admin_{admin_id}', admin_id % 2 == 0))
+
+        start = time.perf_counter()
+        per_call_connect(path)
+        report('connect на каждый вызов', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pooled_sync(manager)
+        report('общее соединение', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(pooled_async(manager))
+        report('общее соединение, async', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(pooled_async_concurrent(manager))
+        report('общее соединение, gather', time.perf_counter() - start)
+
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
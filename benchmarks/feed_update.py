@@ -0,0 +1,46 @@
+"""
+Время получения файла клиента из Google Drive: как раньше (учетные данные и клиент
+создаются на каждый вызов) и с долгоживущим клиентом.
+Нужны файл сервисного аккаунта и TARGET_FOLDER_NAME в .env.
+
+Запуск из корня проекта:
+    python -m benchmarks.feed_update "Название клиента"
+"""
+import asyncio
+import sys
+import time
+from typing import Tuple
+
+from google_drive_api import google_drive
+
+
+ROUNDS = 5
+
+
+async def read_stream(stream) -> Tuple[bool, str]:
+    """Заменяет отправку на сервер: просто дочитывает файл. Неуспех, чтобы версия файла не запоминалась."""
+    size = 0
+    async for chunk in stream:
+        size += len(chunk)
+    return False, f'{size} байт'
+
+
+async def measure(file_name: str, reset_each_call: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        if reset_each_call:
+            google_drive.reset_drive_client()
+        await google_drive.run_file_updating(file_name=file_name, upload=read_stream)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+async def main(file_name: str) -> None:
+    before = await measure(file_name=file_name, reset_each_call=True)
+    print(f'клиент на каждый вызов: {before:.2f} с на обновление')
+    after = await measure(file_name=file_name, reset_each_call=False)
+    print(f'долгоживущий клиент:    {after:.2f} с на обновление')
+    google_drive.close_drive_client()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1]))
@@ -0,0 +1,38 @@
+"""
+Время сборки недельной, месячной и годовой статистики из дневных строк базы.
+Строки генерируются: по умолчанию тысяча объявлений за квартал.
+
+Запуск из корня проекта:
+    python -m benchmarks.stats_aggregation [объявлений] [дней]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from avito_api.stats_aggregation import aggregate_daily_rows, rows_to_items
+
+
+def make_rows(items: int, days: int) -> list:
+    first_day = date(2024, 1, 1)
+    dates = [(first_day + timedelta(days=offset)).isoformat() for offset in range(days)]
+    return [
+        (item_id, day, random.randint(0, 100), random.randint(0, 5), random.randint(0, 10))
+        for item_id in range(1, items + 1) for day in dates
+    ]
+
+
+def main(items: int = 1000, days: int = 90) -> None:
+    rows = make_rows(items=items, days=days)
+    print(f'строк: {len(rows)}')
+    started = time.perf_counter()
+    rows_to_items(rows)
+    print(f'{"day":>5}: {(time.perf_counter() - started) * 1000:.0f} мс')
+    for period in ('week', 'month', 'year'):
+        started = time.perf_counter()
+        aggregate_daily_rows(rows=rows, period=period)
+        print(f'{period:>5}: {(time.perf_counter() - started) * 1000:.0f} мс')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
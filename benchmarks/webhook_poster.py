@@ -0,0 +1,102 @@
+"""
+Отправляет ненастоящие обновления Telegram на вебхук и измеряет задержку.
+
+Без аргументов поднимает на свободном порту собственный сервер вебхука с пустым обработчиком
+и измеряет время от отправки обновления до его попадания в обработчик.
+С адресом отправляет обновления на уже запущенного бота (BOT_MODE=webhook) и измеряет время ответа сервера.
+
+Запуск из корня проекта:
+    python -m benchmarks.webhook_poster 200
+    python -m benchmarks.webhook_poster 200 http://localhost:5555/webhook
+
+Для запущенного бота нужен тот же WEBHOOK_SECRET, что и у него, иначе сервер ответит 401.
+"""
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+
+from bot_api.webhook import create_webhook_app, get_secret_token
+
+
+HOST = '127.0.0.1'
+PATH = '/webhook'
+
+
+def make_update(update_id: int) -> Dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': 1000 + update_id % 50, 'type': 'private'},
+            'from': {'id': 1000 + update_id % 50, 'is_bot': False, 'first_name': 'Тест'},
+            'text': 'Привет',
+        }
+    }
+
+
+async def post_updates(url: str, count: int, sent: Dict[int, float]) -> List[float]:
+    headers = {'X-Telegram-Bot-Api-Secret-Token': get_secret_token()}
+    latencies = []
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def post(update_id: int) -> None:
+            sent[update_id] = time.perf_counter()
+            async with session.post(url, json=make_update(update_id)) as response:
+                response.raise_for_status()
+            latencies.append(time.perf_counter() - sent[update_id])
+
+        await asyncio.gather(*(post(update_id) for update_id in range(1, count + 1)))
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{name:<22} среднее {statistics.mean(latencies) * 1000:7.2f} мс, p95 {p95 * 1000:7.2f} мс')
+
+
+async def run_local(count: int) -> None:
+    sent: Dict[int, float] = {}
+    delivered: List[float] = []
+    done = asyncio.Event()
+
+    dp = Dispatcher()
+
+    @dp.message()
+    async def handler(message: Message) -> None:
+        delivered.append(time.perf_counter() - sent[message.message_id])
+        if len(delivered) == count:
+            done.set()
+
+    bot = Bot('123456:fake')
+    runner = web.AppRunner(create_webhook_app(dispatcher=dp, bot=bot, path=PATH, secret_token=get_secret_token()))
+    await runner.setup()
+    site = web.TCPSite(runner, host=HOST, port=0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        responses = await post_updates(url=f'http://{HOST}:{port}{PATH}', count=count, sent=sent)
+        await asyncio.wait_for(done.wait(), timeout=30)
+    finally:
+        await runner.cleanup()
+    report('ответ сервера', responses)
+    report('до обработчика', delivered)
+
+
+async def main(count: int, url: Optional[str]) -> None:
+    if url is None:
+        await run_local(count=count)
+    else:
+        report('ответ сервера', await post_updates(url=url, count=count, sent={}))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(count=int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+                     url=sys.argv[2] if len(sys.argv) > 2 else None))
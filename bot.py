@@ -7,25 +7,64 @@ from aiogram.enums import ParseMode
 from aiogram.utils.callback_answer import CallbackAnswerMiddleware
 from aiogram.utils.chat_action import ChatActionMiddleware
 
-from bot_api.middlewares import CleanerMiddleware
-from bot_api.settings import token
+from avito_api.avito import close_session, token_manager
+from bot_api.server_requests import Request
+from bot_api.render import render_pool
+from bot_api.scheduler import feed_sync_scheduler
+from bot_api.workers import WorkerPool
+from database.db import init_db, close_db
+from database.fsm_storage import create_fsm_storage
+from google_drive_api.google_drive import close_drive_client
+from bot_api.middlewares import CleanerMiddleware, WorkerDispatchMiddleware, CHAT_CLEANER
+from bot_api.settings import token, webhook, fsm, workers
+from bot_api.webhook import run_webhook
 from bot_api.handlers import router
 
 
 TOKEN = token.bot_token.get_secret_value()
 
 
-dp = Dispatcher()
-dp.include_router(router)
-dp.callback_query.middleware(CallbackAnswerMiddleware())
-dp.message.middleware(ChatActionMiddleware())
-dp.message.middleware(CleanerMiddleware())
-dp.callback_query.middleware(CleanerMiddleware())
+def create_dispatcher(main_process: bool = False) -> Dispatcher:
+    """
+    Диспетчер с обработчиками. В режиме нескольких процессов его создает и каждый процесс-обработчик,
+    а фоновые задачи (обновление токенов, синхронизация фидов) выполняет только основной процесс.
+    """
+    dispatcher = Dispatcher(storage=create_fsm_storage(redis_url=fsm.fsm_redis_url))
+    dispatcher.include_router(router)
+    dispatcher.callback_query.middleware(CallbackAnswerMiddleware())
+    dispatcher.message.middleware(ChatActionMiddleware())
+    dispatcher.message.middleware(CleanerMiddleware())
+    dispatcher.callback_query.middleware(CleanerMiddleware())
+    dispatcher.startup.register(init_db)
+    if main_process:
+        dispatcher.startup.register(token_manager.start)
+    dispatcher.shutdown.register(token_manager.close)
+    if main_process:
+        dispatcher.shutdown.register(feed_sync_scheduler.stop)
+    dispatcher.shutdown.register(CHAT_CLEANER.close)
+    dispatcher.shutdown.register(close_session)
+    dispatcher.shutdown.register(Request.close_session)
+    dispatcher.shutdown.register(close_db)
+    dispatcher.shutdown.register(render_pool.close)
+    dispatcher.shutdown.register(close_drive_client)
+    return dispatcher
 
 
 async def main() -> None:
     bot = Bot(TOKEN, parse_mode=ParseMode.HTML)
-    await dp.start_polling(bot)
+    dp = create_dispatcher(main_process=True)
+    if workers.bot_workers > 1:
+        pool = WorkerPool(workers=workers.bot_workers, dispatcher_factory=create_dispatcher)
+        pool.start()
+        dp.update.outer_middleware(WorkerDispatchMiddleware(pool))
+        dp.shutdown.register(pool.close)
+    feed_sync_scheduler.start(bot=bot)
+    if webhook.bot_mode == 'webhook':
+        await run_webhook(dispatcher=dp, bot=bot)
+    else:
+        # Если раньше был установлен вебхук, getUpdates вернет ошибку
+        await bot.delete_webhook()
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
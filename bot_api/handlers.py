@@ -1,22 +1,42 @@
-import os.path
+from functools import partial
 from typing import Union, Optional
 
 from aiogram import Router, F
 from aiogram.filters import CommandStart, Command
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
-from aiogram_calendar.simple_calendar import SimpleCalendar, SimpleCalendarCallback
+from aiogram.utils.callback_answer import CallbackAnswer
 
-from changed_calendar.simple_calendar import SimpleCalendar, SimpleCalendarCallback
+from changed_calendar.range_calendar import RangeCalendar
+from changed_calendar.schemas import RangeCalendarCallback, RangeCalAct
 from bot_api.states import Statements
 from bot_api.server_requests import Request
 from bot_api.menu_items import (Customer, EmployeeMenu, AdminMenu, CustomersMenu, AllCustomers, AddCustomer,
-                                DeleteCustomer, EditCustomer)
+                                DeleteCustomer, EditCustomer, AllCustomersStatistic)
 from google_drive_api import google_drive
 
 router = Router()
 
 
+# В состоянии FSM хранятся только название клиента и простые значения, объекты собираются заново при каждом шаге
+async def get_current_customer(state: FSMContext) -> Optional[Customer]:
+    title = (await state.get_data()).get('current_customer')
+    if title:
+        return await Customer.load(title)
+
+
+async def get_add_customer(state: FSMContext) -> AddCustomer:
+    return AddCustomer.from_dict((await state.get_data())['add_customer'])
+
+
+async def save_add_customer(state: FSMContext, add_customer_instance: AddCustomer) -> None:
+    await state.update_data({'add_customer': add_customer_instance.to_dict()})
+
+
+async def get_edit_customer(state: FSMContext) -> EditCustomer:
+    return await EditCustomer.load(title=(await state.get_data())['edit_customer'])
+
+
 # Кнопка старта. Нужна только для того, чтобы не появлялась огромная кнопка НАЧАТЬ в телеграмме
 @router.message(CommandStart())
 async def start_command(message_or_callback: Union[Message, CallbackQuery], state: FSMContext) -> Message:
@@ -33,7 +53,7 @@ async def employee_menu(message_or_callback: Union[Message, CallbackQuery], stat
         message: Message = message_or_callback.message
     else:
         message: Message = message_or_callback
-        if not EmployeeMenu.is_employee(telegram_id=message.from_user.id):
+        if not await EmployeeMenu.is_employee(telegram_id=message.from_user.id):
             return await message.answer(text=EmployeeMenu.employee_menu_restriction)
         else:
             await state.set_state(Statements.EMPLOYEE_MENU)
@@ -62,10 +82,7 @@ async def all_customers(callback_query: CallbackQuery, state: FSMContext) -> Mes
     await state.set_state(Statements.WAITING_CUSTOMER_CHOICE)
     return await callback_query.message.answer(
         text=AllCustomers.all_customers_header,
-        reply_markup=AllCustomers.create_inline_keyboard(
-            buttons=AllCustomers.update_buttons(),
-            callbacks=AllCustomers.update_callbacks()
-        )
+        reply_markup=await AllCustomers.keyboard.get()
     )
 
 
@@ -73,10 +90,10 @@ async def all_customers(callback_query: CallbackQuery, state: FSMContext) -> Mes
 @router.callback_query(F.data == Customer.customer_menu_returning)
 async def customer_menu(callback_query: CallbackQuery, state: FSMContext) -> Message:
     if callback_query.data == Customer.customer_menu_returning:
-        current_customer = (await state.get_data()).get('current_customer')
+        current_customer = await get_current_customer(state)
     elif callback_query.data != AllCustomers.back_customers_menu_callback:
-        current_customer = Customer(callback_query.data)
-        await state.set_data({'current_customer': current_customer})
+        current_customer = await Customer.load(callback_query.data)
+        await state.set_data({'current_customer': current_customer.title})
     else:
         current_customer = None
     if current_customer:
@@ -92,7 +109,7 @@ async def customer_menu(callback_query: CallbackQuery, state: FSMContext) -> Mes
 
 @router.callback_query(F.data == 'autoload', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def autoload(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+    current_customer: Customer = await get_current_customer(state)
     return await callback_query.message.answer(
         text=current_customer.header_customer(autoload=True),
         reply_markup=current_customer.create_inline_keyboard(
@@ -104,11 +121,11 @@ async def autoload(callback_query: CallbackQuery, state: FSMContext) -> Message:
 
 @router.callback_query(F.data == 'get_link', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def get_link(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+    current_customer: Customer = await get_current_customer(state)
     return await callback_query.message.answer(
         text=current_customer.autoload_menu_get_link.format(
             title=current_customer.title,
-            url=current_customer.get_autoload_link()
+            url=await current_customer.get_autoload_link()
         ),
         reply_markup=current_customer.create_inline_keyboard(
             buttons=[current_customer.back_button],
@@ -119,9 +136,9 @@ async def get_link(callback_query: CallbackQuery, state: FSMContext) -> Message:
 
 @router.callback_query(F.data == 'delete_link', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def delete_link(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+    current_customer: Customer = await get_current_customer(state)
     return await callback_query.message.answer(
-        text=current_customer.delete_autoload_link(),
+        text=await current_customer.delete_autoload_link(),
         reply_markup=current_customer.create_inline_keyboard(
             buttons=[current_customer.back_button],
             callbacks=[current_customer.autoload_menu_back_button]
@@ -131,12 +148,14 @@ async def delete_link(callback_query: CallbackQuery, state: FSMContext) -> Messa
 
 @router.callback_query(F.data == 'update_feed', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def update_feed(callback_query: CallbackQuery, state: FSMContext) -> Optional[Message]:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+    current_customer: Customer = await get_current_customer(state)
     message_to_delete = await callback_query.message.answer(text='Подождите...')
-    data = google_drive.run_file_updating(file_name=current_customer.title)
+    updating = await google_drive.run_file_updating(
+        file_name=current_customer.title,
+        upload=partial(Request.upload_feed, current_customer.title)
+    )
 
-    if data:
-        updating = Request.update_feed(company_name=current_customer.title, data=data)
+    if updating:
         await message_to_delete.delete()
         return await callback_query.message.answer(
             text=updating,
@@ -160,8 +179,8 @@ async def update_feed(callback_query: CallbackQuery, state: FSMContext) -> Optio
 
 @router.callback_query(F.data == 'get_autoload_report', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def update_feed(callback_query: CallbackQuery, state: FSMContext) -> Optional[Message]:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
-    report = current_customer.get_autoload_report()
+    current_customer: Customer = await get_current_customer(state)
+    report = await current_customer.get_autoload_report()
     return await callback_query.message.answer(
         text=report,
         reply_markup=current_customer.create_inline_keyboard(
@@ -173,7 +192,7 @@ async def update_feed(callback_query: CallbackQuery, state: FSMContext) -> Optio
 
 @router.callback_query(F.data == 'statistic', Statements.WAITING_CUSTOMER_MENU_CHOICE)
 async def statistic(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+    current_customer: Customer = await get_current_customer(state)
     await state.set_state(Statements.WAITING_STATISTIC_PERIOD)
     return await callback_query.message.answer(
         text=current_customer.statistic_header,
@@ -185,66 +204,74 @@ async def statistic(callback_query: CallbackQuery, state: FSMContext) -> Message
 
 
 @router.callback_query(Statements.WAITING_STATISTIC_PERIOD)
-async def statistic_period(callback_query: CallbackQuery, state: FSMContext) -> None:
-    current_customer: Customer = (await state.get_data()).get('current_customer')
+async def statistic_period(callback_query: CallbackQuery, state: FSMContext) -> Optional[Message]:
+    current_customer: Customer = await get_current_customer(state)
     if callback_query.data != current_customer.customer_menu_returning:
-        await state.set_state(Statements.WAITING_FOR_DATE_FROM)
-        await nav_cal_handler(callback_query, state)
+        return await nav_cal_handler(callback_query, state)
     else:
         await state.set_state(Statements.WAITING_CUSTOMER_MENU_CHOICE)
         await statistic(callback_query, state)
 
 
-@router.message(lambda x: x.text in ['day', 'week', 'month'])
+def create_range_calendar() -> RangeCalendar:
+    calendar = RangeCalendar(
+        cancel_btn=Customer.statistic_calendar_cancel,
+        today_btn=Customer.statistic_calendar_today,
+        last_days_btn=Customer.statistic_calendar_last_days
+    )
+    calendar.set_dates_range(Customer.statistic_calendar_date_from, Customer.statistic_calendar_date_to)
+    return calendar
+
+
 async def nav_cal_handler(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    if callback_query.data in ['day', 'week', 'month']:
+    """Превратит сообщение с меню в календарь выбора периода, дальше все шаги меняют это же сообщение."""
+    if callback_query.data in Customer.statistic_periods:
         await state.update_data({'period': callback_query.data})
-    current_state = await state.get_state()
-    if current_state == Statements.WAITING_FOR_DATE_FROM:
-        choice_of_day = Customer.statistic_date_from
-    else:
-        choice_of_day = Customer.statistic_date_to
-    return await callback_query.message.answer(
-        text=choice_of_day,
-        reply_markup=await SimpleCalendar().start_calendar()
+    await state.set_state(Statements.WAITING_FOR_DATES)
+    return await callback_query.message.edit_text(
+        text=Customer.statistic_dates_range,
+        reply_markup=await create_range_calendar().start_calendar()
     )
 
 
-@router.callback_query(SimpleCalendarCallback.filter())
-async def calendar_handler(callback_query: CallbackQuery, callback_data: SimpleCalendarCallback,
-                           state: FSMContext) -> Message:
-    calendar = SimpleCalendar()
-    calendar.set_dates_range(Customer.statistic_calendar_date_from,
-                             Customer.statistic_calendar_date_to)
-    selected, date = await calendar.process_selection(callback_query, callback_data)
-    if selected:
-        current_state = await state.get_state()
-        if current_state == Statements.WAITING_FOR_DATE_FROM:
-            await state.set_state(Statements.WAITING_FOR_DATE_TO)
-            await state.update_data({'date_from': date.strftime(Customer.statistic_dates_format)})
-            await nav_cal_handler(callback_query, state)
-        else:
-            current_customer: Customer = (await state.get_data()).get('current_customer')
-            await state.set_state(Statements.THE_CHOICE_IS_MADE)
-            await state.update_data({'date_to': date.strftime(Customer.statistic_dates_format)})
-            return await callback_query.message.answer(
-                text=Customer.statistic_dates_choice.format(
-                    date_from=(await state.get_data()).get('date_from'),
-                    date_to=(await state.get_data()).get('date_to')),
-                reply_markup=current_customer.create_inline_keyboard(
-                    buttons=current_customer.yes_no_buttons,
-                    callbacks=current_customer.yes_no_callbacks
-                )
+@router.callback_query(RangeCalendarCallback.filter(), Statements.WAITING_FOR_DATES)
+async def calendar_handler(callback_query: CallbackQuery, callback_data: RangeCalendarCallback,
+                           state: FSMContext, callback_answer: CallbackAnswer) -> Message:
+    if callback_data.act == RangeCalAct.cancel:
+        # Календарь не удаляется, а снова становится меню выбора периода: сообщение изменено на месте,
+        # поэтому CleanerMiddleware не будет удалять его повторно
+        current_customer: Customer = await get_current_customer(state)
+        await state.set_state(Statements.WAITING_STATISTIC_PERIOD)
+        return await callback_query.message.edit_text(
+            text=current_customer.statistic_header,
+            reply_markup=current_customer.create_inline_keyboard(
+                buttons=current_customer.statistic_menu_buttons,
+                callbacks=current_customer.statistic_menu_callbacks
             )
+        )
+    # На запрос отвечает только CallbackAnswerMiddleware, календарь лишь настраивает ответ
+    selected, dates = await create_range_calendar().process_selection(callback_query, callback_data, callback_answer)
+    if not selected:
+        return callback_query.message
+    date_from, date_to = (date.strftime(Customer.statistic_dates_format) for date in dates)
+    current_customer: Customer = await get_current_customer(state)
+    await state.set_state(Statements.THE_CHOICE_IS_MADE)
+    await state.update_data({'date_from': date_from, 'date_to': date_to})
+    return await callback_query.message.edit_text(
+        text=Customer.statistic_dates_choice.format(date_from=date_from, date_to=date_to),
+        reply_markup=current_customer.create_inline_keyboard(
+            buttons=current_customer.yes_no_buttons,
+            callbacks=current_customer.yes_no_callbacks
+        )
+    )
 
 
 @router.callback_query(Statements.THE_CHOICE_IS_MADE)
 async def validate_the_dates_choice(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    current_data = await state.get_data()
-    current_customer: Customer = current_data.get('current_customer')
-    new_data = {'current_customer': current_customer}
+    current_customer: Customer = await get_current_customer(state)
+    new_data = {'current_customer': current_customer.title, 'period': (await state.get_data()).get('period')}
     if callback_query.data == 'yes':
-        chosen_dates_statistic = current_customer.get_statistic(
+        chosen_dates_statistic = await current_customer.get_statistic(
             date_from=(await state.get_data()).get('date_from'),
             date_to=(await state.get_data()).get('date_to'),
             period=(await state.get_data()).get('period')
@@ -252,19 +279,19 @@ async def validate_the_dates_choice(callback_query: CallbackQuery, state: FSMCon
 
         await state.set_state(Statements.WAITING_CUSTOMER_MENU_CHOICE)
         if chosen_dates_statistic is not None:
-            file_to_send = current_customer.create_exel_file_from_statistic(data=chosen_dates_statistic)
+            file_to_send = await current_customer.create_exel_file_from_statistic(
+                data=chosen_dates_statistic,
+                period=(await state.get_data()).get('period')
+            )
 
             if file_to_send:
-                path_to_file = os.path.abspath(file_to_send)
-                message_to_delete = await callback_query.message.answer_document(
-                    document=FSInputFile(path_to_file),
+                return await callback_query.message.answer_document(
+                    document=file_to_send,
                     reply_markup=current_customer.create_inline_keyboard(
                         buttons=[current_customer.back_button],
                         callbacks=[current_customer.statistic_back_callback]
                     )
                 )
-                current_customer.delete_temp_exel_file(path_to_file)
-                return message_to_delete
             else:
                 return await callback_query.message.answer(
                     text=current_customer.statistic_empty_data,
@@ -283,8 +310,29 @@ async def validate_the_dates_choice(callback_query: CallbackQuery, state: FSMCon
             )
     else:
         await state.set_data(new_data)
-        await state.set_state(Statements.WAITING_FOR_DATE_FROM)
-        await nav_cal_handler(callback_query, state)
+        return await nav_cal_handler(callback_query, state)
+
+
+@router.callback_query(F.data == 'all_customers_statistic')
+async def all_customers_statistic(callback_query: CallbackQuery, state: FSMContext) -> Message:
+    date_from, date_to = AllCustomersStatistic.previous_month()
+    message_to_delete = await callback_query.message.answer(
+        text=AllCustomersStatistic.all_statistic_wait.format(date_from=date_from, date_to=date_to)
+    )
+    file_to_send, caption = await AllCustomersStatistic.create_report(date_from=date_from, date_to=date_to)
+    await message_to_delete.delete()
+    reply_markup = AllCustomersStatistic.create_inline_keyboard(
+        buttons=[AllCustomersStatistic.back_button],
+        callbacks=[AllCustomersStatistic.back_customers_menu_callback]
+    )
+    if file_to_send:
+        return await callback_query.message.answer_document(
+            document=file_to_send,
+            caption=caption,
+            reply_markup=reply_markup
+        )
+    else:
+        return await callback_query.message.answer(text=caption, reply_markup=reply_markup)
 
 
 @router.callback_query(F.data == 'add_customer')
@@ -313,7 +361,7 @@ async def add_customer_title(
         message: Message = message_or_callback
         if current_state == Statements.WAITING_FOR_TITLE:
             add_customer_instance = AddCustomer(title=message.text)
-            await state.set_data({'add_customer_instance': add_customer_instance})
+            await state.set_data({'add_customer': add_customer_instance.to_dict()})
         await state.set_state(Statements.WAITING_FOR_AVITO_ID)
         return await message.answer(
             text=AddCustomer.common_header.format(
@@ -324,8 +372,9 @@ async def add_customer_title(
 
 @router.message(Statements.WAITING_FOR_AVITO_ID)
 async def add_customer_avito_id(message: Message, state: FSMContext) -> Message:
-    add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+    add_customer_instance: AddCustomer = await get_add_customer(state)
     is_valid_avito_id = add_customer_instance.set_avito_id(message.text)
+    await save_add_customer(state, add_customer_instance)
     if is_valid_avito_id is None:
         message_to_delete = await message.answer(text=AddCustomer.not_valid_avito_id)
         return message_to_delete
@@ -340,8 +389,9 @@ async def add_customer_avito_id(message: Message, state: FSMContext) -> Message:
 
 @router.message(Statements.WAITING_FOR_CLIENT_ID)
 async def add_customer_client_id(message: Message, state: FSMContext) -> Message:
-    add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+    add_customer_instance: AddCustomer = await get_add_customer(state)
     add_customer_instance.set_client_id(message.text)
+    await save_add_customer(state, add_customer_instance)
     await state.set_state(Statements.WAITING_FOR_CLIENT_SECRET)
     return await message.answer(text=AddCustomer.common_header.format(
         item=AddCustomer.client_secret_item
@@ -352,8 +402,9 @@ async def add_customer_client_id(message: Message, state: FSMContext) -> Message
 async def add_customer_client_secret(message: Message, state: FSMContext) -> Message:
     current_state = await state.get_state()
     if current_state == Statements.WAITING_FOR_CLIENT_SECRET:
-        add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+        add_customer_instance: AddCustomer = await get_add_customer(state)
         add_customer_instance.set_client_secret(message.text)
+        await save_add_customer(state, add_customer_instance)
     await state.set_state(Statements.WAITING_FOR_CHAT_WITH_CLIENT)
     return await message.answer(text=AddCustomer.common_header.format(
         item=AddCustomer.chat_with_client_item
@@ -364,8 +415,9 @@ async def add_customer_client_secret(message: Message, state: FSMContext) -> Mes
 async def add_customer_chat_with_client_link(message: Message, state: FSMContext, is_redirect: bool = False) -> \
         Message:
     if not is_redirect:
-        add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+        add_customer_instance: AddCustomer = await get_add_customer(state)
         is_valid_link = add_customer_instance.set_chat_with_client_link(chat_with_client_link=message.text)
+        await save_add_customer(state, add_customer_instance)
     else:
         is_valid_link = True
     if is_valid_link:
@@ -379,8 +431,9 @@ async def add_customer_chat_with_client_link(message: Message, state: FSMContext
 
 @router.message(Statements.WAITING_FOR_CHAT_ABOUT_CLIENT)
 async def add_customer_chat_about_client_link(message: Message, state: FSMContext) -> Message:
-    add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+    add_customer_instance: AddCustomer = await get_add_customer(state)
     is_valid_link = add_customer_instance.set_chat_about_client_link(chat_about_client_link=message.text)
+    await save_add_customer(state, add_customer_instance)
     if is_valid_link:
         await state.set_state(Statements.WAITING_FOR_GOOGLE_DOC_LINK)
         return await message.answer(text=AddCustomer.common_header.format(
@@ -392,8 +445,9 @@ async def add_customer_chat_about_client_link(message: Message, state: FSMContex
 
 @router.message(Statements.WAITING_FOR_GOOGLE_DOC_LINK)
 async def add_customer_google_doc_link(message: Message, state: FSMContext) -> Message:
-    add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
+    add_customer_instance: AddCustomer = await get_add_customer(state)
     is_valid_link = add_customer_instance.set_google_doc_link(google_doc_link=message.text)
+    await save_add_customer(state, add_customer_instance)
     if is_valid_link:
         await state.set_state(Statements.GOT_ALL_CLIENT_INFO)
         return await message.answer(
@@ -410,8 +464,8 @@ async def add_customer_google_doc_link(message: Message, state: FSMContext) -> M
 @router.callback_query(Statements.GOT_ALL_CLIENT_INFO)
 async def add_customer_confirmation(callback_query: CallbackQuery, state: FSMContext) -> Message:
     if callback_query.data == 'yes':
-        add_customer_instance: AddCustomer = (await state.get_data()).get('add_customer_instance')
-        result = add_customer_instance.add_customer_to_db()
+        add_customer_instance: AddCustomer = await get_add_customer(state)
+        result = await add_customer_instance.add_customer_to_db()
         message_to_delete = await callback_query.message.answer(
             text=result,
             reply_markup=AddCustomer.create_inline_keyboard(
@@ -433,10 +487,7 @@ async def delete_customer(callback_query: CallbackQuery, state: FSMContext) -> M
     await state.set_state(Statements.WAITING_FOR_CLIENT_TO_DELETE)
     return await callback_query.message.answer(
         text=DeleteCustomer.delete_customer_header,
-        reply_markup=DeleteCustomer.create_inline_keyboard(
-            buttons=DeleteCustomer.update_buttons(),
-            callbacks=DeleteCustomer.update_callbacks()
-        )
+        reply_markup=await DeleteCustomer.keyboard.get()
     )
 
 
@@ -447,7 +498,7 @@ async def deleting_customer(callback_query: CallbackQuery, state: FSMContext) ->
         return await customers_menu(callback_query, state)
     else:
         message_to_delete = await callback_query.message.answer(
-            text=DeleteCustomer.delete_customer(
+            text=await DeleteCustomer.delete_customer(
                 title=callback_query.data
             ),
             reply_markup=DeleteCustomer.create_inline_keyboard(
@@ -464,10 +515,7 @@ async def edit_customer(callback_query: CallbackQuery, state: FSMContext) -> Mes
     await state.set_state(Statements.WAITING_FOR_CLIENT_TO_EDIT)
     return await callback_query.message.answer(
         text=EditCustomer.edit_customer_header,
-        reply_markup=EditCustomer.create_inline_keyboard(
-            buttons=EditCustomer.update_buttons(),
-            callbacks=EditCustomer.update_callbacks()
-        )
+        reply_markup=await EditCustomer.keyboard.get()
     )
 
 
@@ -477,8 +525,8 @@ async def editing_customer(callback_query: CallbackQuery, state: FSMContext) ->
         await state.set_state(Statements.EMPLOYEE_MENU)
         return await customers_menu(callback_query, state)
     else:
-        edit_customer_instance: EditCustomer = EditCustomer(callback_query.data)
-        await state.set_data({'edit_customer_instance': edit_customer_instance})
+        edit_customer_instance: EditCustomer = await EditCustomer.load(callback_query.data)
+        await state.set_data({'edit_customer': edit_customer_instance.title})
         await state.set_state(Statements.WAITING_FOR_FIELD_TO_EDIT)
         return await callback_query.message.answer(
             text=edit_customer_instance.represent_current_data(),
@@ -512,16 +560,16 @@ async def editing_customer_field(callback_query: CallbackQuery, state: FSMContex
 
 @router.message(Statements.WAITING_FOR_ATTRIBUTE_TO_EDIT)
 async def editing_customer_field(message: Message, state: FSMContext) -> Message:
-    edit_customer_instance: EditCustomer = (await state.get_data()).get('edit_customer_instance')
+    edit_customer_instance: EditCustomer = await get_edit_customer(state)
     attribute_to_edit = (await state.get_data()).get('attribute_to_edit')
-    is_not_valid = edit_customer_instance.set_chosen_attribute(
+    is_not_valid = await edit_customer_instance.set_chosen_attribute(
         attribute=attribute_to_edit,
         value=message.text
     )
     if is_not_valid:
         return await message.answer(text=is_not_valid)
     else:
-        is_success = edit_customer_instance.change_customer_in_db()
+        is_success = await edit_customer_instance.change_customer_in_db()
         return await message.answer(
             text=edit_customer_instance.represent_current_data(
                 already_changed=True, is_success=is_success
@@ -537,7 +585,7 @@ async def editing_customer_field(message: Message, state: FSMContext) -> Message
 @router.callback_query(F.data == 'admin_menu', Statements.WAITING_FOR_NEW_ADMIN_NAME)
 @router.callback_query(F.data == 'admin_menu', Statements.WAITING_FOR_ADMIN_TO_DELETE)
 async def admin_menu(callback_query: CallbackQuery, state: FSMContext) -> Message:
-    if AdminMenu.is_admin(telegram_id=callback_query.from_user.id):
+    if await AdminMenu.is_admin(telegram_id=callback_query.from_user.id):
         await state.set_state(Statements.WAITING_FOR_ADMIN_ACTION)
         return await callback_query.message.answer(
             text=AdminMenu.admin_menu_header,
@@ -571,10 +619,7 @@ async def admin_menu_action(callback_query: CallbackQuery, state: FSMContext) ->
         await state.set_state(Statements.WAITING_FOR_ADMIN_TO_DELETE)
         return await callback_query.message.answer(
             text=AdminMenu.admin_name_to_delete,
-            reply_markup=AdminMenu.create_inline_keyboard(
-                buttons=AdminMenu.update_buttons(),
-                callbacks=AdminMenu.update_callbacks()
-            )
+            reply_markup=await AdminMenu.admin_names_keyboard.get()
         )
 
 
@@ -587,8 +632,7 @@ async def adding_admin_name(message_or_callback: Union[Message, CallbackQuery],
         return await admin_menu_action(callback_query, state)
     else:
         message: Message = message_or_callback
-        new_admin_instance: AdminMenu = AdminMenu(admin_name=message.text)
-        await state.set_data({'new_admin_instance': new_admin_instance})
+        await state.set_data({'new_admin_name': message.text})
         await state.set_state(Statements.WAITING_FOR_NEW_ADMIN_TG_ID)
         return await message.answer(text=AdminMenu.adding_new_admin_id)
 
@@ -596,12 +640,12 @@ async def adding_admin_name(message_or_callback: Union[Message, CallbackQuery],
 @router.message(Statements.WAITING_FOR_NEW_ADMIN_TG_ID)
 async def admin_menu_tg_id(message: Message, state: FSMContext) -> Message:
     if AdminMenu.validate_tg_id(tg_id=message.text):
-        new_admin_instance: AdminMenu = (await state.get_data()).get('new_admin_instance')
+        new_admin_instance: AdminMenu = AdminMenu(admin_name=(await state.get_data()).get('new_admin_name'))
         new_admin_instance.set_admin_id(message.text)
         await state.set_data({})
         await state.set_state(Statements.EMPLOYEE_MENU)
         return await message.answer(
-            text=new_admin_instance.add_new_admin_to_db(),
+            text=await new_admin_instance.add_new_admin_to_db(),
             reply_markup=new_admin_instance.create_inline_keyboard(
                 buttons=[new_admin_instance.back_button],
                 callbacks=[new_admin_instance.back_to_admin_menu_callback]
@@ -614,7 +658,7 @@ async def admin_menu_tg_id(message: Message, state: FSMContext) -> Message:
 @router.callback_query(Statements.WAITING_FOR_ADMIN_TO_DELETE)
 async def admin_menu_delete(callback_query: CallbackQuery, state: FSMContext) -> Message:
     message_to_delete = await callback_query.message.answer(
-        text=AdminMenu.delete_admin_if_not_in_charge(
+        text=await AdminMenu.delete_admin_if_not_in_charge(
             admin_name=callback_query.data
         ),
         reply_markup=AdminMenu.create_inline_keyboard(
@@ -1,25 +1,20 @@
-from typing import List, Union, Callable
+from typing import Any, Callable, Iterable, List, Optional, Union
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 
-from bot_api.data import RequestObject, Companies
+from database.cache import CachedValue
 
 
 class KeyboardManager:
     def __init__(
             self,
-            buttons: Union[List[str], Callable] = None,
-            callbacks: Union[List[str], Callable] = None,
-            dynamic_data: bool = False
+            buttons: Union[List[str], tuple] = None,
+            callbacks: Union[List[str], tuple] = None
     ):
         self.buttons = buttons
         self.callbacks = callbacks
-        self.dynamic_data = dynamic_data
 
     def create_inline_keyboard(self) -> InlineKeyboardMarkup:
-        if self.dynamic_data:
-            self.buttons = self.buttons()
-            self.callbacks = self.callbacks()
         buttons = [
             [InlineKeyboardButton(text=button, callback_data=callback)]
             for button, callback in zip(self.buttons, self.callbacks)
@@ -34,24 +29,32 @@ class KeyboardManager:
         return ReplyKeyboardMarkup(keyboard=keyboards)
 
 
-def creating_kb_with_request() -> KeyboardManager:
-    keyboard = KeyboardManager(
-        buttons=RequestObject.update_buttons,
-        callbacks=RequestObject.update_callbacks,
-        dynamic_data=True
-    )
-
-    return keyboard
-
-
-def creating_kb_with_db_companies_list() -> KeyboardManager:
-    keyboard = KeyboardManager(
-        buttons=Companies.update_buttons,
-        callbacks=Companies.update_callbacks,
-        dynamic_data=True
-    )
-
-    return keyboard
+class KeyboardSnapshot:
+    """
+    Клавиатура из списка в кэше (название кнопки совпадает с коллбэком) и кнопки «Назад».
+    Собирается один раз на версию кэша, и одна и та же клавиатура отдается всем обработчикам,
+    пока данные не изменятся. Полученную клавиатуру нельзя изменять.
+    """
+
+    def __init__(self, source: CachedValue, items: Callable[[Any], Iterable[str]],
+                 back_button: str, back_callback: str) -> None:
+        self.source = source
+        self.items = items
+        self.back_button = back_button
+        self.back_callback = back_callback
+        self._version: Optional[int] = None
+        self._markup: Optional[InlineKeyboardMarkup] = None
+
+    async def get(self) -> InlineKeyboardMarkup:
+        value = await self.source.get()
+        if self.source.version != self._version:
+            items = tuple(self.items(value))
+            self._markup = KeyboardManager(
+                buttons=items + (self.back_button, ),
+                callbacks=items + (self.back_callback, )
+            ).create_inline_keyboard()
+            self._version = self.source.version
+        return self._markup
 
 
 if __name__ == '__main__':
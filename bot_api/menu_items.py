@@ -1,19 +1,21 @@
-import os
 from copy import copy
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Callable, Literal, Union
+from typing import Dict, Optional, List, Callable, Tuple, Union
 from urllib.parse import urlparse
 
-import openpyxl
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile
 
 from avito_api.avito import get_items_stats, get_autoload_last_completed_report
-from database.db import (get_all_info_about_company, get_in_charge_admin_ids, get_admin_names,
-                         get_companies_titles_list, get_admin_ids, get_links_to_chats, insert_record_to_common_table,
+from avito_api.bulk_stats import collect_all_customers_stats
+from avito_api.stats_aggregation import SUMMED_PERIODS, StatsPeriod
+from database.db import (get_all_info_about_company, get_in_charge_admin_ids, admin_names_cache, companies_cache,
+                         get_companies_titles_list, is_admin_id, is_in_charge_admin_id, insert_record_to_common_table,
                          delete_company, delete_record_from_customers_with_condition, insert_admin,
-                         delete_admin_with_name)
+                         delete_admin_with_name, delete_feed_revision)
 from bot_api.server_requests import Request
-from bot_api.keyboards import KeyboardManager
+from bot_api.keyboards import KeyboardManager, KeyboardSnapshot
+from bot_api.statistic_export import create_statistic_workbook
+from bot_api.render import render_pool
 from log_settings.logger_init import logger
 
 
@@ -57,6 +59,15 @@ class BaseMethodsAndData:
             return url_buttons
 
 
+# Список клиентов одинаковый в меню выбора, удаления и изменения клиента
+customers_keyboard = KeyboardSnapshot(
+    source=companies_cache,
+    items=lambda directory: directory.keys(),
+    back_button=BaseMethodsAndData.back_button,
+    back_callback=BaseMethodsAndData.back_customers_menu_callback
+)
+
+
 class MainMenu:
     pass
 
@@ -69,35 +80,65 @@ class EmployeeMenu(BaseMethodsAndData):
     employee_menu_restriction: str = 'Доступ запрещен.'
 
     @classmethod
-    def is_employee(cls, telegram_id: int) -> bool:
-        return telegram_id in get_admin_ids()
+    async def is_employee(cls, telegram_id: int) -> bool:
+        return await is_admin_id(telegram_id=telegram_id)
 
 
 class CustomersMenu(BaseMethodsAndData):
     customer_menu_header: str = ('Меню клиентов.\n'
                                  'Выберите пункт меню:')
     customer_menu_buttons: List = ['Все клиенты', 'Добавить клиента', 'Удалить клиента', 'Изменить клиента',
-                                   '⬅️ Назад']
+                                   'Статистика по всем клиентам', '⬅️ Назад']
     customer_menu_callbacks: List = ['all_customers', 'add_customer', 'delete_customer', 'edit_customer',
-                                     'employee_menu']
+                                     'all_customers_statistic', 'employee_menu']
 
 
 class AllCustomers(BaseMethodsAndData):
     all_customers_header: str = 'Выберите клиента:'
-    all_customers_buttons: List = []
-    all_customers_callbacks: List = []
+    keyboard: KeyboardSnapshot = customers_keyboard
+
+
+class AllCustomersStatistic(BaseMethodsAndData):
+    all_statistic_wait: str = 'Собираю статистику по всем клиентам за период {date_from} - {date_to}...'
+    all_statistic_caption: str = ('Статистика по всем клиентам за период {date_from} - {date_to}\n'
+                                  'Клиентов: {total}, без статистики: {failed}\n'
+                                  'Время сборки: {wall_clock:.1f} с (последовательно около {sequential:.1f} с)')
+    all_statistic_failed_titles: str = '\nБез статистики: {titles}'
+    all_statistic_empty: str = 'Не удалось получить статистику ни по одному клиенту.'
+    all_statistic_filename: str = 'Статистика {date_from} - {date_to}.xlsx'
+    statistic_dates_format: str = '%Y-%m-%d'
+    caption_max_length: int = 1024
 
     @classmethod
-    def update_buttons(cls):
-        cls.all_customers_buttons = get_companies_titles_list()
-        cls.all_customers_buttons.append(cls.back_button)
-        return cls.all_customers_buttons
+    def previous_month(cls) -> Tuple[str, str]:
+        """Вернет первый и последний день прошлого месяца."""
+        last_day = datetime.now().replace(day=1) - timedelta(days=1)
+        first_day = last_day.replace(day=1)
+        return first_day.strftime(cls.statistic_dates_format), last_day.strftime(cls.statistic_dates_format)
 
     @classmethod
-    def update_callbacks(cls):
-        cls.all_customers_callbacks = cls.all_customers_buttons[:-1]
-        cls.all_customers_callbacks.append(cls.back_customers_menu_callback)
-        return cls.all_customers_callbacks
+    async def create_report(cls, date_from: str, date_to: str) -> Tuple[Optional[BufferedInputFile], str]:
+        """
+        Соберет статистику по всем клиентам в одну книгу (лист на клиента).
+        Вернет файл (или None, если статистики нет) и подпись к нему.
+        """
+        results, wall_clock = await collect_all_customers_stats(date_from=date_from, date_to=date_to)
+        sheets = {result.title: result.items for result in results if isinstance(result.items, list)}
+        failed = [result.title for result in results if not isinstance(result.items, list)]
+        if not sheets:
+            return None, cls.all_statistic_empty
+
+        caption = cls.all_statistic_caption.format(
+            date_from=date_from, date_to=date_to, total=len(results), failed=len(failed), wall_clock=wall_clock,
+            sequential=sum(result.seconds for result in results)
+        )
+        if failed:
+            caption += cls.all_statistic_failed_titles.format(titles=', '.join(failed))
+        file = BufferedInputFile(
+            file=await render_pool.run(create_statistic_workbook, sheets=sheets),
+            filename=cls.all_statistic_filename.format(date_from=date_from, date_to=date_to)
+        )
+        return file, caption[:cls.caption_max_length]
 
 
 class AdminMenu(BaseMethodsAndData):
@@ -120,8 +161,12 @@ class AdminMenu(BaseMethodsAndData):
     not_valid_tg_id: str = ('Телеграм ID должен быть числом.\n'
                             'Введите Телеграм ID:')
     admin_in_charge_ids: Callable = get_in_charge_admin_ids
-    admin_names_buttons: List[str] = []
-    admin_names_callbacks: List[str] = []
+    admin_names_keyboard: KeyboardSnapshot = KeyboardSnapshot(
+        source=admin_names_cache,
+        items=lambda names: names,
+        back_button=BaseMethodsAndData.back_button,
+        back_callback=back_to_admin_menu_callback
+    )
 
     def __init__(self, admin_name: str) -> None:
         self.admin_name = admin_name
@@ -131,9 +176,9 @@ class AdminMenu(BaseMethodsAndData):
         self.admin_id = tg_id
         return self.admin_id
 
-    def add_new_admin_to_db(self) -> str:
+    async def add_new_admin_to_db(self) -> str:
         try:
-            insert_admin(admin_id=self.admin_id, admin_name=self.admin_name)
+            await insert_admin(admin_id=self.admin_id, admin_name=self.admin_name)
             return self.__class__.new_admin_is_added.format(
                 admin_name=self.admin_name
             )
@@ -145,24 +190,12 @@ class AdminMenu(BaseMethodsAndData):
             )
 
     @classmethod
-    def update_buttons(cls):
-        cls.admin_names_buttons = get_admin_names()
-        cls.admin_names_buttons.append(cls.back_button)
-        return cls.admin_names_buttons
-
-    @classmethod
-    def update_callbacks(cls):
-        cls.admin_names_callbacks = cls.admin_names_buttons[:-1]
-        cls.admin_names_callbacks.append(cls.back_to_admin_menu_callback)
-        return cls.admin_names_callbacks
+    async def is_admin(cls, telegram_id: int) -> bool:
+        return await is_in_charge_admin_id(telegram_id=telegram_id)
 
     @classmethod
-    def is_admin(cls, telegram_id: int) -> bool:
-        return telegram_id in get_in_charge_admin_ids()
-
-    @classmethod
-    def delete_admin_if_not_in_charge(cls, admin_name: str) -> str:
-        if delete_admin_with_name(admin_name=admin_name):
+    async def delete_admin_if_not_in_charge(cls, admin_name: str) -> str:
+        if await delete_admin_with_name(admin_name=admin_name):
             return cls.admin_is_deleted.format(admin_name=admin_name)
         return cls.admin_is_not_deleted.format(admin_name=admin_name)
 
@@ -196,6 +229,17 @@ class AddCustomer(BaseMethodsAndData):
         self.chat_about_client_link = None
         self.google_doc_link = None
 
+    def to_dict(self) -> Dict:
+        """Поля клиента для хранения в состоянии FSM."""
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AddCustomer':
+        instance = cls(title=data['title'])
+        for key, value in data.items():
+            setattr(instance, key, value)
+        return instance
+
     def set_avito_id(self, avito_id: str) -> Optional[str]:
         if not avito_id.isdigit():
             return
@@ -247,9 +291,9 @@ class AddCustomer(BaseMethodsAndData):
                            f'Ссылка на Google doc: {self.google_doc_link}')
         return is_correct
 
-    def add_customer_to_db(self) -> str:
+    async def add_customer_to_db(self) -> str:
         try:
-            insert_record_to_common_table(
+            await insert_record_to_common_table(
                 company_name=self.title,
                 avito_id=self.avito_id,
                 client_id=self.client_id,
@@ -266,28 +310,15 @@ class AddCustomer(BaseMethodsAndData):
 
 class DeleteCustomer(BaseMethodsAndData):
     delete_customer_header: str = 'Выберите клиента для удаления: '
-    delete_customer_buttons: List[str] = []
-    delete_customer_callbacks: List[str] = []
+    keyboard: KeyboardSnapshot = customers_keyboard
 
     customer_is_deleted: str = 'Клиент {title} успешно удален'
     customer_is_not_deleted: str = 'При удалении клиента произошла ошибка {error}'
 
     @classmethod
-    def update_buttons(cls) -> List[str]:
-        cls.delete_customer_buttons = get_companies_titles_list()
-        cls.delete_customer_buttons.append(cls.back_button)
-        return cls.delete_customer_buttons
-
-    @classmethod
-    def update_callbacks(cls) -> List[str]:
-        cls.delete_customer_callbacks = cls.delete_customer_buttons[:-1]
-        cls.delete_customer_callbacks.append(cls.back_customers_menu_callback)
-        return cls.delete_customer_callbacks
-
-    @classmethod
-    def delete_customer(cls, title: str):
+    async def delete_customer(cls, title: str):
         try:
-            delete_company(company_name=title)
+            await delete_company(company_name=title)
             return cls.customer_is_deleted.format(title=title)
         except Exception as exc:
             logger.warning(msg=f'Ошибка при удалении клиента: {exc}')
@@ -301,8 +332,7 @@ class EditCustomer(BaseMethodsAndData):
     successfully_edited_customer: str = 'Клиент {customer} успешно изменен\n'
     unsuccessfully_edited_customer: str = 'Возникла ошибка при изменении клиента: {error}\n'
 
-    edit_customer_buttons: List[str] = []
-    edit_customer_callbacks: List[str] = []
+    keyboard: KeyboardSnapshot = customers_keyboard
 
     edit_customer_fields_buttons: List[str] = [
         'Название', 'Avito ID', 'Client ID', 'Client Secret', 'Чат с клиентом', 'Чат по клиенту',
@@ -314,7 +344,7 @@ class EditCustomer(BaseMethodsAndData):
         'google_doc_link', BaseMethodsAndData.back_customers_menu_callback
     ]
 
-    def __init__(self, title: str) -> None:
+    def __init__(self, title: str, data: Dict) -> None:
         self.title = title
         self.avito_id = None
         self.client_id = None
@@ -322,13 +352,19 @@ class EditCustomer(BaseMethodsAndData):
         self.chat_with_client_link = None
         self.chat_about_client_link = None
         self.google_doc_link = None
-        self.data: Dict = self.get_all_customer_info_from_bd()
+        self.data: Dict = data
 
         for key, value in self.data.items():
             setattr(self, key, value)
 
-    def get_all_customer_info_from_bd(self):
-        data = get_all_info_about_company(title=self.title)
+    @classmethod
+    async def load(cls, title: str) -> 'EditCustomer':
+        """Создаст объект клиента с данными из базы."""
+        return cls(title=title, data=await cls.get_all_customer_info_from_bd(title=title) or {})
+
+    @staticmethod
+    async def get_all_customer_info_from_bd(title: str):
+        data = await get_all_info_about_company(title=title)
         return data
 
     def represent_current_data(self, already_changed: bool = False, is_success: Union[Optional[str]] = None) -> str:
@@ -347,22 +383,10 @@ class EditCustomer(BaseMethodsAndData):
             represent_header += temp_string
         return represent_header
 
-    @classmethod
-    def update_buttons(cls) -> List[str]:
-        cls.edit_customer_buttons = get_companies_titles_list()
-        cls.edit_customer_buttons.append(cls.back_button)
-        return cls.edit_customer_buttons
-
-    @classmethod
-    def update_callbacks(cls) -> List[str]:
-        cls.edit_customer_callbacks = cls.edit_customer_buttons[:-1]
-        cls.edit_customer_callbacks.append(cls.back_customers_menu_callback)
-        return cls.edit_customer_callbacks
-
-    def set_chosen_attribute(self, attribute: str, value: Union[str, int]):
+    async def set_chosen_attribute(self, attribute: str, value: Union[str, int]):
         ask_to_input_again = '\nПопробуйте еще раз:'
         if attribute == 'title':
-            if value in get_companies_titles_list():
+            if value in await get_companies_titles_list():
                 return 'Такое название уже есть.' + ask_to_input_again
         elif attribute == 'avito_id':
             if not value.isdigit():
@@ -386,14 +410,14 @@ class EditCustomer(BaseMethodsAndData):
         }
         return data.get(attribute)
 
-    def change_customer_in_db(self) -> str:
+    async def change_customer_in_db(self) -> str:
         try:
-            if delete_record_from_customers_with_condition(
+            if await delete_record_from_customers_with_condition(
                     title=self.title,
                     avito_id=self.avito_id,
                     client_id=self.client_id
             ):
-                insert_record_to_common_table(
+                await insert_record_to_common_table(
                     company_name=self.title,
                     avito_id=self.avito_id,
                     client_id=self.client_id,
@@ -402,6 +426,9 @@ class EditCustomer(BaseMethodsAndData):
                     chat_about_client=self.chat_about_client_link,
                     google_doc_link=self.google_doc_link
                 )
+                # После переименования или смены ссылки фид должен загрузиться заново
+                for title in {self.data.get('title'), self.title} - {None}:
+                    await delete_feed_revision(title=title)
                 return self.successfully_edited_customer.format(customer=self.title)
         except Exception as exc:
             logger.warning(msg=f'Ошибка при изменении клиента: {exc}')
@@ -426,13 +453,17 @@ class Customer(BaseMethodsAndData):
     autoload_menu_no_file_in_google_doc: str = 'Файла {file_name} нет в Google doc.'
 
     statistic_header: str = 'Выберите, по какому периоду времени сортировать статистику:'
-    statistic_menu_buttons: List = ['День', 'Неделя', 'Месяц', customer_menu_button]
-    statistic_menu_callbacks: List = ['day', 'week', 'month', customer_menu_returning]
+    statistic_menu_buttons: List = ['День', 'Неделя', 'Месяц', 'Год (сумма по дням)', customer_menu_button]
+    statistic_menu_callbacks: List = ['day', 'week', 'month', 'year', customer_menu_returning]
     statistic_dates_format: str = '%Y-%m-%d'
     statistic_calendar_date_from: datetime = datetime(2020, 1, 1)
     statistic_calendar_date_to: datetime = datetime(2040, 12, 31)
-    statistic_date_from: str = 'Выберите дату начала статистики:'
-    statistic_date_to: str = 'Выберите дату окончания статистики:'
+    statistic_periods: List = ['day', 'week', 'month', 'year']
+    statistic_dates_range: str = ('Выберите в календаре дату начала и дату окончания статистики '
+                                  'или готовый период:')
+    statistic_calendar_cancel: str = 'Отмена'
+    statistic_calendar_today: str = 'Сегодня'
+    statistic_calendar_last_days: str = '{days} дн.'
     statistic_dates_choice: str = ('Выбранные даты верны?\n'
                                    'Начало статистики: {date_from}\n'
                                    'Окончание статистики: {date_to}')
@@ -442,14 +473,16 @@ class Customer(BaseMethodsAndData):
                                      'Если все указано верно, значит статистика пустая (по всем параметрам нули).\n'
                                      'Выберите другие даты для статистики.')
 
-    def __init__(self, title: str) -> None:
+    def __init__(self, title: str, data: Dict) -> None:
         self.title = title
-        self.data: Dict = self.get_data_about_customer()
+        self.data: Dict = data
         self.avito_id = None
         self.client_id = None
         self.client_secret = None
-        self.chat_with_client = None
-        self.chat_about_client = None
+        self.chat_with_client_link = None
+        self.chat_about_client_link = None
+        self.google_doc_link = None
+        self.token = None
 
         for key, value in self.data.items():
             setattr(self, key, value)
@@ -471,7 +504,13 @@ class Customer(BaseMethodsAndData):
             option = ''
         return common_customer_info + f'Выберите действие по {option}:\n'
 
-    def get_data_about_customer(self) -> Dict:
+    @classmethod
+    async def load(cls, title: str) -> 'Customer':
+        """Создаст объект клиента с данными из базы."""
+        return cls(title=title, data=await cls.get_data_about_customer(title=title) or {})
+
+    @staticmethod
+    async def get_data_about_customer(title: str) -> Dict:
         """
         Вернет словарь со всеми значащими элементами из таблицы базы данных:
         - avito_id,
@@ -479,26 +518,31 @@ class Customer(BaseMethodsAndData):
         - client_id,
         - client_secret,
         - chat_with_client_link,
-        - chat_about_client_link
+        - chat_about_client_link,
+        - google_doc_link,
+        - token
 
+        Данные берутся из справочника клиентов, который загружается одним запросом.
         :return: Dict.
         """
-        return get_all_info_about_company(title=self.title)
+        return await get_all_info_about_company(title=title)
 
     # Раздел блока автозагрузки
-    def get_autoload_link(self) -> Optional[str]:
+    async def get_autoload_link(self) -> Optional[str]:
         """Вернет либо ссылку на фид, либо None, если ссылки не существует или возникла ошибка."""
-        return Request.get_url_to_feed(company_name=self.title)
+        return await Request.get_url_to_feed(company_name=self.title)
 
-    def delete_autoload_link(self) -> Optional[str]:
+    async def delete_autoload_link(self) -> Optional[str]:
         """Вернет строку с информацией об успешном удалении, либо об ошибках при запросе."""
-        return Request.delete_file(company_name=self.title)
+        # Следующее обновление фида должно загрузить файл заново, даже если он не менялся
+        await delete_feed_revision(title=self.title)
+        return await Request.delete_file(company_name=self.title)
 
     # Раздел блока статистики
-    def get_statistic(self, date_from: str, date_to: str, period: Literal['week', 'month', 'year']):
+    async def get_statistic(self, date_from: str, date_to: str, period: StatsPeriod):
         try:
-            return get_items_stats(
-                company_name=self.title,
+            return await get_items_stats(
+                company=self.data,
                 date_from=date_from,
                 date_to=date_to,
                 period=period
@@ -507,59 +551,21 @@ class Customer(BaseMethodsAndData):
             logger.warning(msg=f'Ошибка при получении статистики: {exc}')
             return
 
-    def create_exel_file_from_statistic(self, data: List[Dict]):
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-
-        sheet['A1'] = 'Номер объявления'
-        sheet['B1'] = 'Дата'
-        sheet['C1'] = 'Контакты'
-        sheet['D1'] = 'Избранные'
-        sheet['E1'] = 'Просмотры'
-
-        # Заполнение данными
-        row = 2
+    async def create_exel_file_from_statistic(self, data: List[Dict], period: StatsPeriod = 'day') \
+            -> Optional[BufferedInputFile]:
+        """Вернет файл со статистикой, собранный в памяти, либо None, если данные не в том формате."""
         try:
-            for item in data:
-                item_id = item['itemId']
-                stats = item['stats']
-
-                start_row = row
-                end_row = row + len(stats) - 1
-                sheet.cell(row=start_row, column=1, value=item_id)
-
-                if stats:
-                    sheet.merge_cells(f'A{start_row}:A{end_row}')
-
-                for entry in stats:
-                    date = datetime.strptime(entry['date'], '%Y-%m-%d').date().isoformat()
-                    uniq_contacts = entry['uniqContacts']
-                    uniq_favorites = entry['uniqFavorites']
-                    uniq_views = entry['uniqViews']
-
-                    sheet.cell(row=row, column=2, value=date)
-                    sheet.cell(row=row, column=3, value=uniq_contacts)
-                    sheet.cell(row=row, column=4, value=uniq_favorites)
-                    sheet.cell(row=row, column=5, value=uniq_views)
-
-                    row += 1
-
-            filename = f'{self.title}.xlsx'
-            workbook.save(filename)
-
-            return filename
+            content = await render_pool.run(create_statistic_workbook, sheets={self.title: data},
+                                            summed_uniques=period in SUMMED_PERIODS)
+            return BufferedInputFile(file=content, filename=f'{self.title}.xlsx')
 
         except TypeError as exc:
             logger.warning(msg=f'Ошибка при создании эксель файла: {exc}')
-            return exc
-
-    @classmethod
-    def delete_temp_exel_file(cls, filename: str) -> None:
-        os.remove(filename)
+            return None
 
     # Раздел для ссылок на чаты мессенджера
-    def get_links_to_customer_chats(self):
-        return get_links_to_chats(title=self.title)
+    def get_links_to_customer_chats(self) -> List[Optional[str]]:
+        return [self.chat_with_client_link, self.chat_about_client_link, self.google_doc_link]
 
     def create_inline_keyboard_with_urls(self) -> InlineKeyboardMarkup:
         buttons = copy(self.__class__.customer_menu_buttons)
@@ -576,12 +582,12 @@ class Customer(BaseMethodsAndData):
         all_buttons = data_buttons + url_buttons + back_buttons
         return InlineKeyboardMarkup(inline_keyboard=all_buttons)
 
-    def get_autoload_report(self) -> str:
-        report = get_autoload_last_completed_report(company_name=self.title)
+    async def get_autoload_report(self) -> str:
+        report = await get_autoload_last_completed_report(company=self.data)
         if report:
             try:
-                string_representation_report = self.represent_dict_report_to_string(data=report)
-                return string_representation_report
+                # Простое форматирование строки: передача в другой процесс стоила бы дороже него самого
+                return Customer.represent_dict_report_to_string(data=report)
             except Exception as exc:
                 return f'Ошибка: {exc}'
         else:
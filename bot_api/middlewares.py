@@ -1,36 +1,110 @@
-from typing import Callable, Dict, Any, Awaitable, Union
-import queue
+import asyncio
+from typing import Callable, Dict, Any, Awaitable, List, Optional, Set, Union
 
-from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import Message, CallbackQuery, Chat, Update
 
+from bot_api.workers import WorkerPool
 from log_settings.logger_init import logger
 
 
-CLEANER_QUEUE: queue.Queue = queue.Queue()
+# Ограничение Telegram на количество сообщений в одном вызове deleteMessages
+DELETE_MESSAGES_LIMIT = 100
+
+
+class ChatCleaner:
+    """
+    Помнит по каждому чату сообщения, которые нужно удалить при следующем действии пользователя,
+    и удаляет их пачками в фоне.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[int, List[int]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def remember(self, chat_id: int, message_id: int) -> None:
+        self._pending.setdefault(chat_id, []).append(message_id)
+
+    def take(self, chat_id: int) -> List[int]:
+        return self._pending.pop(chat_id, [])
+
+    async def delete(self, bot: Bot, chat_id: int, message_ids: List[int]) -> None:
+        for start in range(0, len(message_ids), DELETE_MESSAGES_LIMIT):
+            try:
+                await bot.delete_messages(chat_id=chat_id,
+                                          message_ids=message_ids[start:start + DELETE_MESSAGES_LIMIT])
+            except Exception as exc:
+                logger.warning(msg=f'Ошибка: {exc}')
+
+    def schedule_delete(self, bot: Bot, chat_id: int, message_ids: List[int]) -> None:
+        task = asyncio.create_task(self.delete(bot=bot, chat_id=chat_id, message_ids=message_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Дождется удалений, которые уже запущены."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+CHAT_CLEANER = ChatCleaner()
 
 
 class CleanerMiddleware(BaseMiddleware):
+    def __init__(self, cleaner: ChatCleaner = CHAT_CLEANER) -> None:
+        self.cleaner = cleaner
+
+    @staticmethod
+    def get_chat_id(event: Union[Message, CallbackQuery], data: Dict[str, Any]) -> Optional[int]:
+        chat: Optional[Chat] = data.get('event_chat')
+        if chat is not None:
+            return chat.id
+        if isinstance(event, Message):
+            return event.chat.id
+        if event.message is not None:
+            return event.message.chat.id
+        return None
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
         event: Union[Message, CallbackQuery],
         data: Dict[str, Any]
     ) -> Any:
-        global CLEANER_QUEUE
-        while not CLEANER_QUEUE.empty():
-            event_to_be_cleaned = CLEANER_QUEUE.get()
-            if isinstance(event_to_be_cleaned, Message):
-                if event_to_be_cleaned.text != '/start':
-                    try:
-                        await event_to_be_cleaned.delete()
-                    except Exception as exc:
-                        logger.warning(msg=f'Ошибка: {exc}')
-        CLEANER_QUEUE.put(event)
-        result = await handler(event, data)
-        if result:
-            CLEANER_QUEUE.put(result)
-        return result
+        chat_id = self.get_chat_id(event=event, data=data)
+        if chat_id is None:
+            return await handler(event, data)
+
+        previous_messages = self.cleaner.take(chat_id)
+        if isinstance(event, Message) and event.text != '/start':
+            self.cleaner.remember(chat_id, event.message_id)
+        try:
+            result = await handler(event, data)
+            if isinstance(result, Message):
+                # Обработчик изменил сообщение на месте, удалять его рано
+                if result.message_id in previous_messages:
+                    previous_messages.remove(result.message_id)
+                self.cleaner.remember(result.chat.id, result.message_id)
+            return result
+        finally:
+            # Удаление не задерживает ответ пользователю
+            if previous_messages:
+                self.cleaner.schedule_delete(bot=data['bot'], chat_id=chat_id, message_ids=previous_messages)
+
+
+class WorkerDispatchMiddleware(BaseMiddleware):
+    """Не обрабатывает обновление в этом процессе, а передает его процессу-обработчику чата."""
+
+    def __init__(self, pool: WorkerPool) -> None:
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> None:
+        self.pool.route(event.model_dump(mode='json', by_alias=True, exclude_none=True))
 
 
 if __name__ == '__main__':
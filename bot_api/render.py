@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+from bot_api.settings import render
+from log_settings.logger_init import logger
+
+
+class RenderPool:
+    """
+    Пул процессов для тяжелой подготовки отчетов (эксель-файлы, текст отчетов),
+    чтобы большая выгрузка не останавливала обработку сообщений остальных пользователей.
+    Функции и их аргументы передаются в другой процесс, поэтому они должны сериализоваться pickle.
+    Процессы запускаются через spawn: к моменту первого отчета у бота уже работают потоки базы и Google Drive,
+    и fork мог бы скопировать в дочерний процесс захваченную ими блокировку.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.rebuilds = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _rebuild(self, broken: ProcessPoolExecutor) -> None:
+        """Заменит пул, в котором умер процесс: такой пул больше не принимает задачи."""
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.rebuilds += 1
+            logger.warning(msg=f'Процесс рендеринга завершился аварийно, пул пересоздан (раз: {self.rebuilds})')
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Выполнит функцию в пуле процессов.
+        Если процесс пула умер, пул пересоздается и задача повторяется один раз.
+        """
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        logger.info(msg=f'Рендеринг {func.__qualname__}: задач в очереди {self.queue_depth} '
+                        f'(максимум {self.max_queue_depth}), процессов {self.workers}')
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+                except BrokenProcessPool:
+                    self._rebuild(executor)
+                    if attempt:
+                        raise
+        finally:
+            self.queue_depth -= 1
+            logger.info(msg=f'Рендеринг {func.__qualname__} занял {time.perf_counter() - started:.2f} с')
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+render_pool = RenderPool(workers=render.render_workers)
+
+
+if __name__ == '__main__':
+    pass
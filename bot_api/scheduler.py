@@ -0,0 +1,128 @@
+import asyncio
+import random
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+
+from aiogram import Bot
+
+from bot_api.server_requests import Request
+from bot_api.settings import feed_sync
+from database.db import get_companies_titles_list, get_in_charge_admin_ids, cache_versions
+from google_drive_api import google_drive
+from log_settings.logger_init import logger
+
+
+class FeedSyncResult(NamedTuple):
+    title: str
+    status: str
+    message: Optional[str] = None
+
+
+class FeedSyncScheduler:
+    """
+    Периодически обновляет фиды всех клиентов из Google Drive и сообщает итог главным админам.
+    Неизмененные файлы не скачиваются (см. google_drive.run_file_updating), поэтому пустой проход дешевый.
+    """
+    updated: str = 'updated'
+    not_changed: str = 'not_changed'
+    no_file: str = 'no_file'
+    failed: str = 'failed'
+
+    report_header: str = 'Фоновая синхронизация фидов:\n'
+    report_updated: str = 'Обновлено: {titles}\n'
+    report_no_file: str = 'Нет файла в Google Drive: {titles}\n'
+    report_failed: str = 'Ошибки:\n{errors}\n'
+
+    def __init__(self, interval: float, jitter: float, concurrency: int) -> None:
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+
+    async def sync_feed(self, title: str, semaphore: asyncio.Semaphore) -> FeedSyncResult:
+        async with semaphore:
+            is_uploaded = False
+
+            async def upload(stream: AsyncIterator[bytes]) -> Tuple[bool, str]:
+                nonlocal is_uploaded
+                is_uploaded, message = await Request.upload_feed(title, stream)
+                return is_uploaded, message
+
+            try:
+                message = await google_drive.run_file_updating(file_name=title, upload=upload)
+            except Exception as exc:
+                logger.warning(msg=f'Ошибка фоновой синхронизации фида {title}: {exc}')
+                return FeedSyncResult(title=title, status=self.failed, message=str(exc))
+
+            if message is None:
+                return FeedSyncResult(title=title, status=self.no_file)
+            if message == google_drive.FEED_NOT_CHANGED.format(file_name=title):
+                return FeedSyncResult(title=title, status=self.not_changed)
+            if is_uploaded:
+                return FeedSyncResult(title=title, status=self.updated)
+            return FeedSyncResult(title=title, status=self.failed, message=message)
+
+    async def sync_all(self) -> List[FeedSyncResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        titles = await get_companies_titles_list()
+        return list(await asyncio.gather(*(self.sync_feed(title=title, semaphore=semaphore) for title in titles)))
+
+    def create_report(self, results: List[FeedSyncResult]) -> Optional[str]:
+        """Соберет текст отчета. Если ничего не обновилось и ошибок нет, отчет не нужен."""
+        by_status = {status: [result for result in results if result.status == status]
+                     for status in (self.updated, self.no_file, self.failed)}
+        if not by_status[self.updated] and not by_status[self.failed]:
+            return None
+        report = self.report_header
+        if by_status[self.updated]:
+            report += self.report_updated.format(titles=', '.join(result.title for result in by_status[self.updated]))
+        if by_status[self.no_file]:
+            report += self.report_no_file.format(titles=', '.join(result.title for result in by_status[self.no_file]))
+        if by_status[self.failed]:
+            report += self.report_failed.format(
+                errors='\n'.join(f'{result.title}: {result.message}' for result in by_status[self.failed])
+            )
+        return report
+
+    async def send_report(self, bot: Bot, report: str) -> None:
+        for admin_id in await get_in_charge_admin_ids():
+            try:
+                await bot.send_message(chat_id=admin_id, text=report, parse_mode=None)
+            except Exception as exc:
+                logger.warning(msg=f'Не удалось отправить отчет о синхронизации админу {admin_id}: {exc}')
+
+    async def run(self, bot: Bot) -> None:
+        while True:
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+            try:
+                # Клиентов могли изменить процессы-обработчики
+                await cache_versions.sync()
+                results = await self.sync_all()
+                logger.info(msg='Фоновая синхронизация фидов: ' + ', '.join(
+                    f'{status} {sum(result.status == status for result in results)}'
+                    for status in (self.updated, self.not_changed, self.no_file, self.failed)
+                ))
+                report = self.create_report(results=results)
+                if report:
+                    await self.send_report(bot=bot, report=report)
+            except Exception as exc:
+                logger.warning(msg=f'Ошибка фоновой синхронизации фидов: {exc}')
+
+    def start(self, bot: Bot) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self.run(bot=bot))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+feed_sync_scheduler = FeedSyncScheduler(
+    interval=feed_sync.feed_sync_interval,
+    jitter=feed_sync.feed_sync_jitter,
+    concurrency=feed_sync.feed_sync_concurrency
+)
+
+
+if __name__ == '__main__':
+    pass
@@ -1,51 +1,114 @@
-from typing import List, Dict, Union, Optional
-
-import requests
+import asyncio
 import json
+from typing import AsyncIterable, AsyncIterator, List, Dict, Union, Optional, Tuple
+
+import aiohttp
 
 from bot_api.settings import url
+from log_settings.logger_init import logger
+
+
+# Размер части файла при потоковой отправке фида на сервер
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 class Request:
-    url: str = url
+    url: str = url.url.get_secret_value() if url.url else ''
     headers_for_xml: Dict = {'Content-Type': 'application/xml'}
     headers_for_json: Dict = {'Content-type': 'application/json'}
+    timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=60, connect=10)
+    upload_timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=300, connect=10)
+    connections_limit: int = 10
+    _session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def get_session(cls) -> aiohttp.ClientSession:
+        """Вернет keep-alive сессию к серверу фидов, общую для всех запросов."""
+        if cls._session is None or cls._session.closed:
+            connector = aiohttp.TCPConnector(limit=cls.connections_limit, keepalive_timeout=60)
+            cls._session = aiohttp.ClientSession(connector=connector, timeout=cls.timeout)
+        return cls._session
 
     @classmethod
-    def get_files_list(cls, resource: str = 'all_files') -> List:
+    async def close_session(cls) -> None:
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
+    @staticmethod
+    async def _iter_chunks(data: bytes) -> AsyncIterator[bytes]:
+        view = memoryview(data)
+        for start in range(0, len(view), UPLOAD_CHUNK_SIZE):
+            yield bytes(view[start:start + UPLOAD_CHUNK_SIZE])
+
+    @classmethod
+    async def get_files_list(cls, resource: str = 'all_files') -> List:
         needed_url = cls.url + resource
-        response = requests.get(url=needed_url)
-        file_list = json.loads(response.content)
+        try:
+            async with cls.get_session().get(url=needed_url) as response:
+                file_list = json.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            logger.warning(msg=f'Ошибка при получении списка файлов: {exc}')
+            return []
         return file_list
 
     @classmethod
-    def get_url_to_feed(cls, company_name: str) -> str:
+    async def get_url_to_feed(cls, company_name: str) -> str:
+        """Проверит наличие фида HEAD-запросом, не скачивая сам файл."""
         if not company_name.endswith('xml'):
             company_name += '.xml'
         url = cls.url + company_name
-        response = requests.get(url=url)
-        if response.status_code == 200:
+        try:
+            async with cls.get_session().head(url=url, allow_redirects=True) as response:
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            logger.warning(msg=f'Ошибка при проверке файла {company_name}: {exc}')
+            status = None
+        if status == 200:
             return url
         else:
             return f'Файл {company_name} не найден.'
 
     @classmethod
-    def update_feed(cls, company_name: str, data: bytes) -> Optional[str]:
+    async def upload_feed(cls, company_name: str, data: Union[bytes, AsyncIterable[bytes]]) -> Tuple[bool, str]:
+        """
+        Отправит фид на сервер частями (chunked transfer encoding).
+        Можно передать как готовые байты, так и асинхронный итератор с частями файла.
+        Вернет признак успеха и текст для пользователя.
+        """
         url = cls.url + company_name
-        response = requests.post(url=url, data=data, headers=cls.headers_for_json)
-        if response.status_code == 200:
-            return f'Файл {company_name} успешно обновлен.'
+        body = cls._iter_chunks(data) if isinstance(data, (bytes, bytearray)) else data
+        try:
+            async with cls.get_session().post(url=url, data=body, headers=cls.headers_for_json,
+                                              timeout=cls.upload_timeout) as response:
+                status = response.status
+        except Exception as exc:
+            # Сюда попадают и ошибки источника данных, если файл передается потоком
+            logger.warning(msg=f'Ошибка при обновлении фида {company_name}: {exc}')
+            return False, (f'Обновление не прошло.\n'
+                           f'Ошибка: {exc}')
+        if status == 200:
+            return True, f'Файл {company_name} успешно обновлен.'
         else:
-            return (f'Обновление не прошло.\n'
-                    f'Код ошибки: {response.status_code}')
+            return False, (f'Обновление не прошло.\n'
+                           f'Код ошибки: {status}')
+
+    @classmethod
+    async def update_feed(cls, company_name: str, data: Union[bytes, AsyncIterable[bytes]]) -> Optional[str]:
+        _, result = await cls.upload_feed(company_name=company_name, data=data)
+        return result
 
     @classmethod
-    def delete_file(cls, company_name: str):
+    async def delete_file(cls, company_name: str):
         if not company_name.endswith('xml'):
             company_name += '.xml'
         data = json.dumps({'company_name': company_name})
-        response = requests.delete(url=cls.url, data=data)
-        return response.content.decode(encoding='utf-8')
+        try:
+            async with cls.get_session().delete(url=cls.url, data=data) as response:
+                return (await response.read()).decode(encoding='utf-8')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            logger.warning(msg=f'Ошибка при удалении файла {company_name}: {exc}')
+            return f'Не удалось удалить файл {company_name}: {exc}'
 
 
 if __name__ == '__main__':
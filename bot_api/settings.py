@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from dotenv import load_dotenv
 from pydantic import SecretStr
@@ -20,9 +21,45 @@ class Folder(BaseSettings):
     folder: SecretStr = os.getenv('TARGET_FOLDER_NAME', None)
 
 
+class Render(BaseSettings):
+    render_workers: int = os.getenv('RENDER_WORKERS', 2)
+
+
+class FeedSync(BaseSettings):
+    # Интервал фоновой синхронизации фидов в секундах, 0 - синхронизация выключена
+    feed_sync_interval: int = os.getenv('FEED_SYNC_INTERVAL', 3600)
+    feed_sync_jitter: int = os.getenv('FEED_SYNC_JITTER', 300)
+    feed_sync_concurrency: int = os.getenv('FEED_SYNC_CONCURRENCY', 3)
+
+
+class Webhook(BaseSettings):
+    # polling - опрос getUpdates, webhook - Telegram сам присылает обновления на WEBHOOK_URL
+    bot_mode: str = os.getenv('BOT_MODE', 'polling')
+    webhook_url: Optional[str] = os.getenv('WEBHOOK_URL', None)
+    webhook_path: str = os.getenv('WEBHOOK_PATH', '/webhook')
+    webhook_secret: Optional[SecretStr] = os.getenv('WEBHOOK_SECRET', None)
+    webhook_host: str = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    webhook_port: int = os.getenv('WEBHOOK_PORT', 5555)
+
+
+class Fsm(BaseSettings):
+    # Если задан, состояния хранятся в Redis, иначе в базе SQLite бота
+    fsm_redis_url: Optional[str] = os.getenv('FSM_REDIS_URL', None)
+
+
+class Workers(BaseSettings):
+    # Больше 1 - обновления обрабатывают отдельные процессы, чат всегда попадает в один и тот же процесс
+    bot_workers: int = os.getenv('BOT_WORKERS', 1)
+
+
 token = BotToken()
 url = Url()
 folder = Folder()
+render = Render()
+feed_sync = FeedSync()
+webhook = Webhook()
+fsm = Fsm()
+workers = Workers()
 
 
 if __name__ == '__main__':
@@ -14,8 +14,7 @@ class Statements(StatesGroup):
 
     # Ждем выбор выборки для статистики
     WAITING_STATISTIC_PERIOD = State()
-    WAITING_FOR_DATE_FROM = State()
-    WAITING_FOR_DATE_TO = State()
+    WAITING_FOR_DATES = State()
     THE_CHOICE_IS_MADE = State()
 
     # Добавление нового клиента
@@ -0,0 +1,141 @@
+import io
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+
+STATISTIC_COLUMNS: List[str] = ['Номер объявления', 'Дата', 'Контакты', 'Избранные', 'Просмотры']
+# Для группировок, сложенных из дневных строк: пользователь, заходивший в разные дни, учтен несколько раз
+SUMMED_STATISTIC_COLUMNS: List[str] = ['Номер объявления', 'Дата', 'Контакты (сумма уникальных по дням)',
+                                       'Избранные (сумма уникальных по дням)', 'Просмотры (сумма уникальных по дням)']
+SUMMARY_COLUMNS: List[str] = ['Номер объявления', 'Просмотры', 'Контакты', 'Избранные',
+                               'Контакты / просмотры, %', 'Избранные / просмотры, %']
+SUMMARY_SHEET_TITLE = 'Сводка {title}'
+SUMMARY_TOTAL = 'Итого'
+SUMMARY_NOTE = ('Уникальные просмотры, контакты и избранные сложены по строкам листа со статистикой: '
+                'пользователь, который заходил в разные дни или недели, учтен несколько раз')
+SUMMARY_TOP_HEADER = 'Топ-{top_n} по контактам'
+SUMMARY_ALL_HEADER = 'Все объявления'
+SUMMARY_PLACE = 'Место'
+# Сколько лучших объявлений показать в сводке
+SUMMARY_TOP_N = 10
+# Ограничения Excel на название листа
+SHEET_TITLE_MAX_LENGTH = 31
+SHEET_TITLE_FORBIDDEN_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def iter_statistic_rows(data: List[Dict], summed_uniques: bool = False) -> Iterator[list]:
+    """
+    Вернет строки листа со статистикой в формате ответа Авито: по строке на каждый период каждого объявления.
+    Номер объявления пишется только в первой строке его блока.
+    summed_uniques - значения сложены из дневных, заголовки колонок говорят об этом.
+    """
+    yield SUMMED_STATISTIC_COLUMNS if summed_uniques else STATISTIC_COLUMNS
+    for item in data:
+        item_id = item['itemId']
+        for index, entry in enumerate(item['stats']):
+            date = datetime.strptime(entry['date'], '%Y-%m-%d').date().isoformat()
+            yield [
+                item_id if index == 0 else None,
+                date,
+                entry['uniqContacts'],
+                entry['uniqFavorites'],
+                entry['uniqViews']
+            ]
+
+
+def summarize_statistic(data: List[Dict]) -> pd.DataFrame:
+    """
+    Вернет итоги по объявлениям: просмотры, контакты, избранные и конверсии в процентах от просмотров.
+    Строки отсортированы по номеру объявления, итоги считаются одной группировкой по всем дням сразу.
+    """
+    frame = pd.DataFrame.from_records(
+        [(item['itemId'], entry.get('uniqViews'), entry.get('uniqContacts'), entry.get('uniqFavorites'))
+         for item in data for entry in item['stats']],
+        columns=['item_id', 'views', 'contacts', 'favorites']
+    )
+    values = ['views', 'contacts', 'favorites']
+    frame[values] = frame[values].fillna(0).astype('int64')
+    totals = frame.groupby('item_id', sort=True)[values].sum()
+    add_conversions(totals)
+    return totals.reset_index()
+
+
+def add_conversions(totals: pd.DataFrame) -> None:
+    """Добавит колонки конверсии просмотров в контакты и в избранное, в процентах."""
+    views = totals['views'].replace(0, np.nan)
+    totals['contacts_rate'] = (totals['contacts'] / views * 100).round(2).fillna(0)
+    totals['favorites_rate'] = (totals['favorites'] / views * 100).round(2).fillna(0)
+
+
+def iter_summary_rows(data: List[Dict], top_n: int = SUMMARY_TOP_N) -> Iterator[list]:
+    """
+    Вернет строки листа со сводкой: примечание о суммах, общий итог, топ-N объявлений по контактам и итоги по каждому объявлению.
+    При равенстве контактов выше то объявление, у которого больше просмотров.
+    """
+    totals = summarize_statistic(data=data)
+    overall = totals[['views', 'contacts', 'favorites']].sum().to_frame().T
+    add_conversions(overall)
+
+    yield [SUMMARY_NOTE]
+    yield []
+    yield SUMMARY_COLUMNS
+    yield [SUMMARY_TOTAL, *next(overall.itertuples(index=False, name=None))]
+    yield []
+    yield [SUMMARY_TOP_HEADER.format(top_n=top_n)]
+    yield [SUMMARY_PLACE, *SUMMARY_COLUMNS]
+    top = totals.sort_values(['contacts', 'views'], ascending=False, kind='stable').head(top_n)
+    for place, row in enumerate(top.itertuples(index=False, name=None), start=1):
+        yield [place, *row]
+    yield []
+    yield [SUMMARY_ALL_HEADER]
+    yield SUMMARY_COLUMNS
+    for row in totals.itertuples(index=False, name=None):
+        yield list(row)
+
+
+def make_sheet_title(title: str, used_titles: set) -> str:
+    """Приведет название клиента к допустимому и уникальному названию листа."""
+    sheet_title = SHEET_TITLE_FORBIDDEN_CHARS.sub('_', title)[:SHEET_TITLE_MAX_LENGTH] or 'Лист'
+    base, number = sheet_title, 1
+    while sheet_title.lower() in used_titles:
+        suffix = f' ({number})'
+        sheet_title = base[:SHEET_TITLE_MAX_LENGTH - len(suffix)] + suffix
+        number += 1
+    used_titles.add(sheet_title.lower())
+    return sheet_title
+
+
+def create_statistic_workbook(sheets: Dict[str, List[Dict]], summed_uniques: bool = False) -> bytes:
+    """
+    Соберет книгу, в которой на каждого клиента лист со сводкой и лист со статистикой, и вернет ее содержимое.
+    Книга пишется в режиме write_only: строки не копятся в памяти, а сразу уходят в файл.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    used_titles = set()
+    try:
+        for title, data in sheets.items():
+            if any(item['stats'] for item in data):
+                summary = workbook.create_sheet(
+                    title=make_sheet_title(SUMMARY_SHEET_TITLE.format(title=title), used_titles)
+                )
+                for row in iter_summary_rows(data=data):
+                    summary.append(row)
+            sheet = workbook.create_sheet(title=make_sheet_title(title, used_titles))
+            for row in iter_statistic_rows(data=data, summed_uniques=summed_uniques):
+                sheet.append(row)
+    except Exception:
+        for sheet in workbook.worksheets:
+            sheet.close()
+        raise
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,73 @@
+import asyncio
+import secrets
+from typing import Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from bot_api.settings import webhook
+from log_settings.logger_init import logger
+
+
+# Длина секрета, который создается при запуске, если WEBHOOK_SECRET не задан
+GENERATED_SECRET_BYTES = 32
+
+_generated_secret: Optional[str] = None
+
+
+def get_secret_token() -> str:
+    """
+    Вернет секрет вебхука из WEBHOOK_SECRET, а если он не задан - случайный, созданный один раз на процесс.
+    Без секрета любой, кто достучится до порта, мог бы присылать поддельные обновления от имени админов.
+    """
+    global _generated_secret
+
+    if webhook.webhook_secret is not None and webhook.webhook_secret.get_secret_value():
+        return webhook.webhook_secret.get_secret_value()
+    if _generated_secret is None:
+        _generated_secret = secrets.token_urlsafe(GENERATED_SECRET_BYTES)
+        logger.info(msg='WEBHOOK_SECRET не задан, для вебхука создан случайный секрет')
+    return _generated_secret
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, secret_token: str,
+                       path: str = webhook.webhook_path) -> web.Application:
+    """
+    Создает aiohttp-приложение, которое принимает обновления от Telegram и передает их диспетчеру.
+    Обновление обрабатывается в фоне, Telegram сразу получает ответ 200.
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dispatcher, bot=bot, secret_token=secret_token).register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher) -> None:
+    await bot.set_webhook(
+        url=f'{webhook.webhook_url.rstrip("/")}{webhook.webhook_path}',
+        secret_token=get_secret_token(),
+        allowed_updates=dispatcher.resolve_used_update_types()
+    )
+    logger.info(msg=f'Вебхук установлен: {webhook.webhook_url}')
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    """Запускает сервер вебхука и работает до остановки процесса."""
+    if not webhook.webhook_url:
+        raise ValueError('Для режима webhook нужно задать WEBHOOK_URL')
+    dispatcher.startup.register(set_webhook)
+    app = create_webhook_app(dispatcher=dispatcher, bot=bot, secret_token=get_secret_token())
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=webhook.webhook_host, port=webhook.webhook_port)
+    await site.start()
+    logger.info(msg=f'Сервер вебхука слушает {webhook.webhook_host}:{webhook.webhook_port}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,160 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import Any, Callable, Dict, List, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.enums import ParseMode
+
+from bot_api.settings import token
+from database.db import cache_versions
+from log_settings.logger_init import logger
+
+
+# Сколько секунд ждать завершения процесса-обработчика при остановке бота
+WORKER_STOP_TIMEOUT = 10
+# Как часто процесс-обработчик проверяет, не пора ли остановиться, пока очередь пуста
+WORKER_POLL_INTERVAL = 1
+# Сколько секунд ждать следующего обновления в очереди упавшего процесса при переносе их в новый
+WORKER_DRAIN_TIMEOUT = 0.1
+
+
+def get_chat_id(update: Dict) -> int:
+    """Вернет id чата, к которому относится обновление, или id пользователя, если чата нет."""
+    for key, event in update.items():
+        if key == 'update_id' or not isinstance(event, dict):
+            continue
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = event.get('from')
+        if user:
+            return user['id']
+    return 0
+
+
+async def process_update(dispatcher: Dispatcher, bot: Bot, update: Dict[str, Any]) -> None:
+    try:
+        # Кэши могли сбросить в другом процессе
+        await cache_versions.sync()
+        await dispatcher.feed_raw_update(bot=bot, update=update)
+    except Exception as exc:
+        logger.warning(msg=f'Ошибка при обработке обновления {update.get("update_id")}: {exc}')
+
+
+async def serve_updates(index: int, updates: multiprocessing.Queue,
+                        dispatcher_factory: Callable[[], Dispatcher]) -> None:
+    dispatcher = dispatcher_factory()
+    bot = Bot(token.bot_token.get_secret_value(), parse_mode=ParseMode.HTML)
+    workflow_data = {'dispatcher': dispatcher, 'bots': [bot], **dispatcher.workflow_data}
+    await dispatcher.emit_startup(bot=bot, **workflow_data)
+    logger.info(msg=f'Обработчик обновлений {index} запущен')
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    try:
+        while True:
+            try:
+                update = await loop.run_in_executor(None, updates.get, True, WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if update is None:
+                break
+            task = asyncio.create_task(process_update(dispatcher=dispatcher, bot=bot, update=update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await dispatcher.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+        logger.info(msg=f'Обработчик обновлений {index} остановлен')
+
+
+def run_worker(index: int, updates: multiprocessing.Queue, dispatcher_factory: Callable[[], Dispatcher]) -> None:
+    try:
+        asyncio.run(serve_updates(index=index, updates=updates, dispatcher_factory=dispatcher_factory))
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    Процессы, которые обрабатывают обновления Telegram.
+    Обновление отправляется в процесс по id чата, поэтому чат всегда обслуживает один процесс,
+    а состояния FSM и кэши общие через базу.
+    """
+
+    def __init__(self, workers: int, dispatcher_factory: Callable[[], Dispatcher]) -> None:
+        self.workers = workers
+        self.dispatcher_factory = dispatcher_factory
+        self._context = multiprocessing.get_context('spawn')
+        self._queues: List[multiprocessing.Queue] = []
+        self._processes: List[multiprocessing.Process] = []
+
+    def _start_worker(self, index: int) -> Tuple[multiprocessing.Queue, multiprocessing.Process]:
+        updates = self._context.Queue()
+        process = self._context.Process(
+            target=run_worker, args=(index, updates, self.dispatcher_factory), name=f'bot-worker-{index}'
+        )
+        process.start()
+        return updates, process
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            updates, process = self._start_worker(index)
+            self._queues.append(updates)
+            self._processes.append(process)
+        logger.info(msg=f'Запущено обработчиков обновлений: {self.workers}')
+
+    def _restart_worker(self, index: int) -> None:
+        """
+        Запустит вместо упавшего процесса новый, с новой очередью.
+        Обновления, которые упавший процесс не успел забрать, переносятся в новую очередь в том же порядке.
+        """
+        dead = self._processes[index]
+        logger.warning(msg=f'Обработчик {dead.name} завершился с кодом {dead.exitcode}, запускаю заново')
+        old_updates = self._queues[index]
+        self._queues[index], self._processes[index] = self._start_worker(index)
+        moved = 0
+        while True:
+            try:
+                update = old_updates.get(True, WORKER_DRAIN_TIMEOUT)
+            except queue.Empty:
+                break
+            except Exception as exc:
+                # Процесс мог умереть посреди чтения, тогда остаток очереди не прочитать
+                logger.warning(msg=f'Не удалось дочитать очередь обработчика {dead.name}, '
+                                   f'остаток обновлений потерян: {exc}')
+                break
+            if update is not None:
+                self._queues[index].put(update)
+                moved += 1
+        old_updates.cancel_join_thread()
+        old_updates.close()
+        logger.info(msg=f'Обновлений перенесено в новый обработчик {index}: {moved}')
+
+    def route(self, update: Dict[str, Any]) -> int:
+        """
+        Передаст обновление процессу, который обслуживает его чат, и вернет номер процесса.
+        Если процесс упал, перед отправкой он перезапускается, иначе его чаты остались бы без ответа.
+        """
+        index = get_chat_id(update) % self.workers
+        if not self._processes[index].is_alive():
+            self._restart_worker(index)
+        self._queues[index].put(update)
+        return index
+
+    async def close(self) -> None:
+        for updates in self._queues:
+            updates.put(None)
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(msg=f'Обработчик {process.name} не остановился, завершаю принудительно')
+                process.terminate()
+        self._queues.clear()
+        self._processes.clear()
+
+
+if __name__ == '__main__':
+    pass
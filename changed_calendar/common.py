@@ -1,12 +1,22 @@
 import calendar
 import locale
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from aiogram.types import User
+from aiogram.utils.callback_answer import CallbackAnswer
 from datetime import datetime
 
 from .schemas import CalendarLabels
 
 
+@lru_cache(maxsize=None)
+def get_locale_labels(locale: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Days of week and month names in the locale, computed once per process"""
+    with calendar.different_locale(locale):
+        return tuple(calendar.day_abbr), tuple(calendar.month_abbr[1:])
+
+
 async def get_user_locale(from_user: User) -> str:
     "Returns user locale in format en_US, accepts User instance from Message, CallbackData etc"
     loc = from_user.language_code
@@ -33,9 +43,9 @@ class GenericCalendar:
         self._labels = CalendarLabels()
         if locale:
             # getting month names and days of week in specified locale
-            with calendar.different_locale(locale):
-                self._labels.days_of_week = list(calendar.day_abbr)
-                self._labels.months = calendar.month_abbr[1:]
+            days_of_week, months = get_locale_labels(locale)
+            self._labels.days_of_week = list(days_of_week)
+            self._labels.months = list(months)
 
         if cancel_btn:
             self._labels.cancel_caption = cancel_btn
@@ -51,20 +61,43 @@ class GenericCalendar:
         self.min_date = min_date
         self.max_date = max_date
 
-    async def process_day_select(self, data, query):
-        """Checks selected date is in allowed range of dates"""
-        date = datetime(int(data.year), int(data.month), int(data.day))
+    @staticmethod
+    async def answer_query(query, callback_answer: Optional[CallbackAnswer] = None, text: Optional[str] = None,
+                           show_alert: Optional[bool] = None, cache_time: Optional[int] = None):
+        """
+        Answers the query. If callback_answer of aiogram CallbackAnswerMiddleware is passed,
+        only configures it: the middleware answers once after the handler, a second answer would fail
+        """
+        if callback_answer is None:
+            await query.answer(text, show_alert=show_alert, cache_time=cache_time)
+            return
+        callback_answer.text = text
+        callback_answer.show_alert = show_alert
+        callback_answer.cache_time = cache_time
+
+    async def check_date_in_range(self, date: datetime, query,
+                                  callback_answer: Optional[CallbackAnswer] = None) -> bool:
+        """Checks date is in allowed range of dates, answers the query with an error if not"""
         if self.min_date and self.min_date > date:
-            await query.answer(
-                f'The date have to be later {self.min_date.strftime("%d/%m/%Y")}',
+            await self.answer_query(
+                query, callback_answer,
+                text=f'The date have to be later {self.min_date.strftime("%d/%m/%Y")}',
                 show_alert=self.show_alerts
             )
-            return False, None
+            return False
         elif self.max_date and self.max_date < date:
-            await query.answer(
-                f'The date have to be before {self.max_date.strftime("%d/%m/%Y")}',
+            await self.answer_query(
+                query, callback_answer,
+                text=f'The date have to be before {self.max_date.strftime("%d/%m/%Y")}',
                 show_alert=self.show_alerts
             )
+            return False
+        return True
+
+    async def process_day_select(self, data, query):
+        """Checks selected date is in allowed range of dates"""
+        date = datetime(int(data.year), int(data.month), int(data.day))
+        if not await self.check_date_in_range(date, query):
             return False, None
         try:
             await query.message.delete() # removing inline keyboard
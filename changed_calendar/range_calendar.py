@@ -0,0 +1,219 @@
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import CallbackQuery
+from aiogram.utils.callback_answer import CallbackAnswer
+
+from .schemas import RangeCalendarCallback, RangeCalAct, highlight, selected, superscript
+from .common import GenericCalendar
+
+
+# number of rendered months kept in memory, including months with a selected range start
+RANGE_CALENDAR_CACHE_SIZE = 512
+DEFAULT_PRESETS = (7, 30, 90)
+START_FORMAT = '%Y%m%d'
+
+IGNORE_CALLBACK = RangeCalendarCallback(act=RangeCalAct.ignore).pack()
+
+
+def build_range_keyboard(
+    year: int,
+    month: int,
+    start: Optional[str],
+    presets: Tuple[int, ...],
+    days_of_week: Tuple[str, ...],
+    months: Tuple[str, ...],
+    cancel_caption: str,
+    today_caption: str,
+    last_days_caption: str,
+    min_date: Optional[datetime],
+    max_date: Optional[datetime],
+    today: date
+) -> InlineKeyboardMarkup:
+    """
+    Builds a month keyboard for picking a range of dates in one message.
+    start is the already selected beginning of the range (YYYYMMDD) or None.
+    Depends only on its arguments, so the result can be cached and shared: do not modify it.
+    """
+    start_date = datetime.strptime(start, START_FORMAT).date() if start else None
+
+    def callback(act: RangeCalAct, day: int = 1, days: Optional[int] = None) -> str:
+        return RangeCalendarCallback(act=act, year=year, month=month, day=day, start=start, days=days).pack()
+
+    def day_text(day: int) -> str:
+        day_date = date(year, month, day)
+        text = str(day)
+        if (min_date and datetime(year, month, day) < min_date) or (max_date and datetime(year, month, day) > max_date):
+            text = superscript(text)
+        if day_date == start_date:
+            return selected(text)
+        if day_date == today:
+            return highlight(text)
+        return text
+
+    kb = []
+
+    # Presets - last N days up to today
+    kb.append([
+        InlineKeyboardButton(
+            text=last_days_caption.format(days=days),
+            callback_data=callback(RangeCalAct.preset, days=days)
+        )
+        for days in presets
+    ])
+
+    # Selected start of the range
+    if start_date:
+        kb.append([InlineKeyboardButton(text=f'{start_date:%d.%m.%Y} — …', callback_data=IGNORE_CALLBACK)])
+
+    kb.append([
+        InlineKeyboardButton(text="<<", callback_data=callback(RangeCalAct.prev_y)),
+        InlineKeyboardButton(text=str(year) if year != today.year else highlight(year), callback_data=IGNORE_CALLBACK),
+        InlineKeyboardButton(text=">>", callback_data=callback(RangeCalAct.next_y)),
+    ])
+
+    month_str = months[month - 1]
+    kb.append([
+        InlineKeyboardButton(text="<", callback_data=callback(RangeCalAct.prev_m)),
+        InlineKeyboardButton(
+            text=highlight(month_str) if (year, month) == (today.year, today.month) else month_str,
+            callback_data=IGNORE_CALLBACK
+        ),
+        InlineKeyboardButton(text=">", callback_data=callback(RangeCalAct.next_m)),
+    ])
+
+    kb.append([InlineKeyboardButton(text=weekday, callback_data=IGNORE_CALLBACK) for weekday in days_of_week])
+
+    for week in calendar.monthcalendar(year, month):
+        kb.append([
+            InlineKeyboardButton(text=day_text(day), callback_data=callback(RangeCalAct.day, day=day))
+            if day else InlineKeyboardButton(text=" ", callback_data=IGNORE_CALLBACK)
+            for day in week
+        ])
+
+    kb.append([
+        InlineKeyboardButton(text=cancel_caption, callback_data=callback(RangeCalAct.cancel)),
+        InlineKeyboardButton(text=" ", callback_data=IGNORE_CALLBACK),
+        InlineKeyboardButton(text=today_caption, callback_data=callback(RangeCalAct.today)),
+    ])
+    return InlineKeyboardMarkup(row_width=7, inline_keyboard=kb)
+
+
+cached_range_keyboard = lru_cache(maxsize=RANGE_CALENDAR_CACHE_SIZE)(build_range_keyboard)
+
+
+class RangeCalendar(GenericCalendar):
+    """
+    Picks a range of dates in a single message: the first selected day is the start,
+    the second one is the end, navigation edits the same keyboard in place.
+    Preset buttons select the last N days up to today with one click.
+    """
+
+    def __init__(
+        self,
+        locale: str = None,
+        cancel_btn: str = None,
+        today_btn: str = None,
+        last_days_btn: str = None,
+        presets: Tuple[int, ...] = DEFAULT_PRESETS,
+        show_alerts: bool = False
+    ) -> None:
+        """
+        Parameters as in GenericCalendar, plus:
+        last_days_btn (str): caption for preset buttons with {days} placeholder
+        presets (tuple): lengths of preset ranges in days
+        """
+        super().__init__(locale=locale, cancel_btn=cancel_btn, today_btn=today_btn, show_alerts=show_alerts)
+        if last_days_btn:
+            self._labels.last_days_caption = last_days_btn
+        self.presets = tuple(presets)
+
+    async def start_calendar(
+        self,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        start: Optional[datetime] = None
+    ) -> InlineKeyboardMarkup:
+        """
+        Creates an inline keyboard with the provided year and month
+        :param int year: Year to use in the calendar, if None the current year is used.
+        :param int month: Month to use in the calendar, if None the current month is used.
+        :param datetime start: Already selected start of the range, if any.
+        :return: Returns InlineKeyboardMarkup object with the calendar.
+        """
+        today = date.today()
+        return cached_range_keyboard(
+            year=today.year if year is None else year,
+            month=today.month if month is None else month,
+            start=start.strftime(START_FORMAT) if start else None,
+            presets=self.presets,
+            days_of_week=tuple(self._labels.days_of_week),
+            months=tuple(self._labels.months),
+            cancel_caption=self._labels.cancel_caption,
+            today_caption=self._labels.today_caption,
+            last_days_caption=self._labels.last_days_caption,
+            min_date=self.min_date,
+            max_date=self.max_date,
+            today=today
+        )
+
+    async def _update_calendar(self, query: CallbackQuery, with_date: datetime, start: Optional[datetime]):
+        await query.message.edit_reply_markup(
+            reply_markup=await self.start_calendar(int(with_date.year), int(with_date.month), start=start)
+        )
+
+    async def process_selection(
+        self, query: CallbackQuery, data: RangeCalendarCallback, callback_answer: Optional[CallbackAnswer] = None
+    ) -> Tuple[bool, Optional[Tuple[datetime, datetime]]]:
+        """
+        Process the callback_query. Navigation and selection of the range start edit the keyboard in place.
+        The message is not deleted when the range is selected, so it can be reused for the answer.
+        Cancel is left to the caller, the calendar does nothing on it.
+        Pass callback_answer when CallbackAnswerMiddleware is used, then the query is answered only by it.
+        :return: Returns a tuple (Boolean, (datetime, datetime)), indicating if the range is selected
+                    and returning its start and end if so.
+        """
+        return_data = (False, None)
+        start = datetime.strptime(data.start, START_FORMAT) if data.start else None
+
+        if data.act == RangeCalAct.ignore:
+            await self.answer_query(query, callback_answer, cache_time=60)
+            return return_data
+
+        if data.act == RangeCalAct.preset:
+            end = datetime.combine(date.today(), datetime.min.time())
+            begin = end - timedelta(days=int(data.days) - 1)
+            if self.max_date and end > self.max_date:
+                end = self.max_date
+            if self.min_date and begin < self.min_date:
+                begin = self.min_date
+            return True, (min(begin, end), end)
+
+        if data.act == RangeCalAct.day:
+            day = datetime(int(data.year), int(data.month), int(data.day))
+            if not await self.check_date_in_range(day, query, callback_answer):
+                return return_data
+            if start is None:
+                await self._update_calendar(query, day, start=day)
+                return return_data
+            return True, (min(start, day), max(start, day))
+
+        temp_date = datetime(int(data.year), int(data.month), 1)
+        if data.act == RangeCalAct.prev_y:
+            await self._update_calendar(query, datetime(int(data.year) - 1, int(data.month), 1), start)
+        if data.act == RangeCalAct.next_y:
+            await self._update_calendar(query, datetime(int(data.year) + 1, int(data.month), 1), start)
+        if data.act == RangeCalAct.prev_m:
+            await self._update_calendar(query, temp_date - timedelta(days=1), start)
+        if data.act == RangeCalAct.next_m:
+            await self._update_calendar(query, temp_date + timedelta(days=31), start)
+        if data.act == RangeCalAct.today:
+            today = datetime.now()
+            if today.year != int(data.year) or today.month != int(data.month):
+                await self._update_calendar(query, today, start)
+            else:
+                await self.answer_query(query, callback_answer, cache_time=60)
+        return return_data
@@ -28,6 +28,18 @@ class DialogCalAct(str, Enum):
     day = 'SET-DAY'
 
 
+class RangeCalAct(str, Enum):
+    ignore = 'IGNORE'
+    prev_y = 'PREV-YEAR'
+    next_y = 'NEXT-YEAR'
+    prev_m = 'PREV-MONTH'
+    next_m = 'NEXT-MONTH'
+    cancel = 'CANCEL'
+    today = 'TODAY'
+    day = 'DAY'
+    preset = 'PRESET'
+
+
 class CalendarCallback(CallbackData, prefix="calendar"):
     act: str
     year: Optional[int] = None
@@ -43,6 +55,12 @@ class DialogCalendarCallback(CalendarCallback, prefix="dialog_calendar"):
     act: DialogCalAct
 
 
+class RangeCalendarCallback(CalendarCallback, prefix="range_calendar"):
+    act: RangeCalAct
+    start: Optional[str] = None  # already selected start of the range, YYYYMMDD
+    days: Optional[int] = None  # length of the preset range
+
+
 class CalendarLabels(BaseModel):
     "Schema to pass labels for calendar. Can be used to put in different languages"
     days_of_week: conlist(str, max_length=7, min_length=7) = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
@@ -51,6 +69,7 @@ class CalendarLabels(BaseModel):
     ]
     cancel_caption: str = Field(default='Cancel', description='Caprion for Cancel button')
     today_caption: str = Field(default='Today', description='Caprion for Cancel button')
+    last_days_caption: str = Field(default='{days}d', description='Caption for preset range buttons')
 
 
 HIGHLIGHT_FORMAT = "[{}]"
@@ -60,6 +79,13 @@ def highlight(text):
     return HIGHLIGHT_FORMAT.format(text)
 
 
+SELECTED_FORMAT = "·{}·"
+
+
+def selected(text):
+    return SELECTED_FORMAT.format(text)
+
+
 def superscript(text):
     normal = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+-=()"
     super_s = "ᴬᴮᶜᴰᴱᶠᴳᴴᴵᴶᴷᴸᴹᴺᴼᴾQᴿˢᵀᵁⱽᵂˣʸᶻᵃᵇᶜᵈᵉᶠᵍʰᶦʲᵏˡᵐⁿᵒᵖ۹ʳˢᵗᵘᵛʷˣʸᶻ⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾"
@@ -1,5 +1,7 @@
 import calendar
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.types import CallbackQuery
@@ -8,14 +10,140 @@ from .schemas import SimpleCalendarCallback, SimpleCalAct, highlight, superscrip
 from .common import GenericCalendar
 
 
+# number of rendered months kept in memory, one month is about 50 buttons
+CALENDAR_CACHE_SIZE = 256
+
+IGNORE_CALLBACK = SimpleCalendarCallback(act=SimpleCalAct.ignore).pack()  # placeholder for no answer buttons
+
+
+def build_month_keyboard(
+    year: int,
+    month: int,
+    days_of_week: Tuple[str, ...],
+    months: Tuple[str, ...],
+    cancel_caption: str,
+    today_caption: str,
+    min_date: Optional[datetime],
+    max_date: Optional[datetime],
+    today: date
+) -> InlineKeyboardMarkup:
+    """
+    Builds an inline keyboard for the month. Depends only on its arguments,
+    so the result can be cached and shared between users: do not modify it.
+    """
+    now_weekday = days_of_week[today.weekday()]
+    now_month, now_year, now_day = today.month, today.year, today.day
+
+    def highlight_month():
+        month_str = months[month - 1]
+        if now_month == month and now_year == year:
+            return highlight(month_str)
+        return month_str
+
+    def highlight_weekday():
+        if now_month == month and now_year == year and now_weekday == weekday:
+            return highlight(weekday)
+        return weekday
+
+    def format_day_string():
+        date_to_check = datetime(year, month, day)
+        if min_date and date_to_check < min_date:
+            return superscript(str(day))
+        elif max_date and date_to_check > max_date:
+            return superscript(str(day))
+        return str(day)
+
+    def highlight_day():
+        day_string = format_day_string()
+        if now_month == month and now_year == year and now_day == day:
+            return highlight(day_string)
+        return day_string
+
+    # building a calendar keyboard
+    kb = []
+
+    # First row - Year
+    years_row = []
+    years_row.append(InlineKeyboardButton(
+        text="<<",
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_y, year=year, month=month, day=1).pack()
+    ))
+    years_row.append(InlineKeyboardButton(
+        text=str(year) if year != now_year else highlight(year),
+        callback_data=IGNORE_CALLBACK
+    ))
+    years_row.append(InlineKeyboardButton(
+        text=">>",
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_y, year=year, month=month, day=1).pack()
+    ))
+    kb.append(years_row)
+
+    # Month nav Buttons
+    month_row = []
+    month_row.append(InlineKeyboardButton(
+        text="<",
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_m, year=year, month=month, day=1).pack()
+    ))
+    month_row.append(InlineKeyboardButton(
+        text=highlight_month(),
+        callback_data=IGNORE_CALLBACK
+    ))
+    month_row.append(InlineKeyboardButton(
+        text=">",
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_m, year=year, month=month, day=1).pack()
+    ))
+    kb.append(month_row)
+
+    # Week Days
+    week_days_labels_row = []
+    for weekday in days_of_week:
+        week_days_labels_row.append(
+            InlineKeyboardButton(text=highlight_weekday(), callback_data=IGNORE_CALLBACK)
+        )
+    kb.append(week_days_labels_row)
+
+    # Calendar rows - Days of month
+    month_calendar = calendar.monthcalendar(year, month)
+
+    for week in month_calendar:
+        days_row = []
+        for day in week:
+            if day == 0:
+                days_row.append(InlineKeyboardButton(text=" ", callback_data=IGNORE_CALLBACK))
+                continue
+            days_row.append(InlineKeyboardButton(
+                text=highlight_day(),
+                callback_data=SimpleCalendarCallback(act=SimpleCalAct.day, year=year, month=month, day=day).pack()
+            ))
+        kb.append(days_row)
+
+    # nav today & cancel button
+    cancel_row = []
+    cancel_row.append(InlineKeyboardButton(
+        text=cancel_caption,
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.cancel, year=year, month=month, day=day).pack()
+    ))
+    cancel_row.append(InlineKeyboardButton(text=" ", callback_data=IGNORE_CALLBACK))
+    cancel_row.append(InlineKeyboardButton(
+        text=today_caption,
+        callback_data=SimpleCalendarCallback(act=SimpleCalAct.today, year=year, month=month, day=day).pack()
+    ))
+    kb.append(cancel_row)
+    return InlineKeyboardMarkup(row_width=7, inline_keyboard=kb)
+
+
+# the key is (year, month, labels, min/max date, today), so a new day or other labels give a new keyboard
+cached_month_keyboard = lru_cache(maxsize=CALENDAR_CACHE_SIZE)(build_month_keyboard)
+
+
 class SimpleCalendar(GenericCalendar):
 
-    ignore_callback = SimpleCalendarCallback(act=SimpleCalAct.ignore).pack()  # placeholder for no answer buttons
+    ignore_callback = IGNORE_CALLBACK
 
     async def start_calendar(
         self,
-        year: int = datetime.now().year,
-        month: int = datetime.now().month
+        year: Optional[int] = None,
+        month: Optional[int] = None
     ) -> InlineKeyboardMarkup:
         """
         Creates an inline keyboard with the provided year and month
@@ -23,108 +151,21 @@ class SimpleCalendar(GenericCalendar):
         :param int month: Month to use in the calendar, if None the current month is used.
         :return: Returns InlineKeyboardMarkup object with the calendar.
         """
-
-        today = datetime.now()
-        now_weekday = self._labels.days_of_week[today.weekday()]
-        now_month, now_year, now_day = today.month, today.year, today.day
-
-        def highlight_month():
-            month_str = self._labels.months[month - 1]
-            if now_month == month and now_year == year:
-                return highlight(month_str)
-            return month_str
-
-        def highlight_weekday():
-            if now_month == month and now_year == year and now_weekday == weekday:
-                return highlight(weekday)
-            return weekday
-
-        def format_day_string():
-            date_to_check = datetime(year, month, day)
-            if self.min_date and date_to_check < self.min_date:
-                return superscript(str(day))
-            elif self.max_date and date_to_check > self.max_date:
-                return superscript(str(day))
-            return str(day)
-
-        def highlight_day():
-            day_string = format_day_string()
-            if now_month == month and now_year == year and now_day == day:
-                return highlight(day_string)
-            return day_string
-
-        # building a calendar keyboard
-        kb = []
-
-        # inline_kb = InlineKeyboardMarkup(row_width=7)
-        # First row - Year
-        years_row = []
-        years_row.append(InlineKeyboardButton(
-            text="<<",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_y, year=year, month=month, day=1).pack()
-        ))
-        years_row.append(InlineKeyboardButton(
-            text=str(year) if year != now_year else highlight(year),
-            callback_data=self.ignore_callback
-        ))
-        years_row.append(InlineKeyboardButton(
-            text=">>",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_y, year=year, month=month, day=1).pack()
-        ))
-        kb.append(years_row)
-
-        # Month nav Buttons
-        month_row = []
-        month_row.append(InlineKeyboardButton(
-            text="<",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.prev_m, year=year, month=month, day=1).pack()
-        ))
-        month_row.append(InlineKeyboardButton(
-            text=highlight_month(),
-            callback_data=self.ignore_callback
-        ))
-        month_row.append(InlineKeyboardButton(
-            text=">",
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.next_m, year=year, month=month, day=1).pack()
-        ))
-        kb.append(month_row)
-
-        # Week Days
-        week_days_labels_row = []
-        for weekday in self._labels.days_of_week:
-            week_days_labels_row.append(
-                InlineKeyboardButton(text=highlight_weekday(), callback_data=self.ignore_callback)
-            )
-        kb.append(week_days_labels_row)
-
-        # Calendar rows - Days of month
-        month_calendar = calendar.monthcalendar(year, month)
-
-        for week in month_calendar:
-            days_row = []
-            for day in week:
-                if day == 0:
-                    days_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-                    continue
-                days_row.append(InlineKeyboardButton(
-                    text=highlight_day(),
-                    callback_data=SimpleCalendarCallback(act=SimpleCalAct.day, year=year, month=month, day=day).pack()
-                ))
-            kb.append(days_row)
-
-        # nav today & cancel button
-        cancel_row = []
-        cancel_row.append(InlineKeyboardButton(
-            text=self._labels.cancel_caption,
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.cancel, year=year, month=month, day=day).pack()
-        ))
-        cancel_row.append(InlineKeyboardButton(text=" ", callback_data=self.ignore_callback))
-        cancel_row.append(InlineKeyboardButton(
-            text=self._labels.today_caption,
-            callback_data=SimpleCalendarCallback(act=SimpleCalAct.today, year=year, month=month, day=day).pack()
-        ))
-        kb.append(cancel_row)
-        return InlineKeyboardMarkup(row_width=7, inline_keyboard=kb)
+        # defaults are taken at call time, not at import
+        today = date.today()
+        year = today.year if year is None else year
+        month = today.month if month is None else month
+        return cached_month_keyboard(
+            year=year,
+            month=month,
+            days_of_week=tuple(self._labels.days_of_week),
+            months=tuple(self._labels.months),
+            cancel_caption=self._labels.cancel_caption,
+            today_caption=self._labels.today_caption,
+            min_date=self.min_date,
+            max_date=self.max_date,
+            today=today
+        )
 
     async def _update_calendar(self, query: CallbackQuery, with_date: datetime):
         await query.message.edit_reply_markup(
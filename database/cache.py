@@ -0,0 +1,49 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class CachedValue(Generic[T]):
+    """
+    Значение из базы, которое хранится в памяти процесса.
+    Перечитывается после invalidate() или по истечении ttl секунд (страховка от изменений в обход бота).
+    Одновременные обращения к устаревшему значению приводят только к одной загрузке.
+    version увеличивается при каждой загрузке, по нему можно понять, что значение сменилось.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[T]], ttl: float) -> None:
+        self.loader = loader
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._loaded_at: Optional[float] = None
+        self._generation: int = 0
+        self.version: int = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self) -> T:
+        if self.is_fresh:
+            return self._value
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.is_fresh:
+                generation = self._generation
+                value = await self.loader()
+                self._value = value
+                self.version += 1
+                # Если кэш сбросили во время загрузки, значение могло уже устареть
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+                return value
+        return self._value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._loaded_at = None
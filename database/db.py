@@ -1,16 +1,29 @@
+import asyncio
 import os.path
 import sqlite3
-from typing import List, Optional, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, FrozenSet, Iterable, List, Optional, Dict, Sequence, Set, Tuple
 
+from database.cache import CachedValue
 from log_settings.logger_init import logger
 
 
 PATH_TO_DB = os.path.join(os.path.dirname(__file__), 'levbov.db')
+# Сколько скомпилированных запросов держит в кэше соединение. Все запросы модуля - константы,
+# поэтому после первого вызова они больше не разбираются заново.
+CACHED_STATEMENTS = 128
+# Через сколько секунд кэш прав доступа перечитывается, даже если его не сбрасывали
+AUTH_CACHE_TTL = 300
+# То же для справочника клиентов
+COMPANIES_CACHE_TTL = 300
 
 CREATE_TOKENS_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS tokens (
     avito_id INTEGER PRIMARY KEY,
        token TEXT,
+  expires_at REAL,
  FOREIGN KEY (avito_id) REFERENCES customers(avito_id)
 )
 """
@@ -36,7 +49,136 @@ CREATE TABLE IF NOT EXISTS admins (
 """
 
 CREATE_OR_UPDATE_TOKEN = """
-INSERT OR REPLACE INTO tokens (avito_id, token) VALUES (?, ?)
+INSERT OR REPLACE INTO tokens (avito_id, token, expires_at) VALUES (?, ?, ?)
+"""
+
+CREATE_FEED_REVISIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS feed_revisions (
+               title VARCHAR(50) PRIMARY KEY,
+             file_id VARCHAR(100),
+        md5_checksum VARCHAR(32),
+       modified_time VARCHAR(30),
+    head_revision_id VARCHAR(100)
+)
+"""
+
+# Состояния FSM: ключи и значения те же, что у RedisStorage aiogram
+CREATE_FSM_STORAGE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS fsm_storage (
+      key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+# Версии кэшей: процесс, изменивший данные, увеличивает версию, остальные процессы сбрасывают свой кэш
+CREATE_CACHE_VERSIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS cache_versions (
+       name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL
+)
+"""
+
+# Дневная статистика объявлений, уже загруженная из Авито
+CREATE_ITEM_STATS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS item_stats (
+          avito_id INTEGER NOT NULL,
+           item_id INTEGER NOT NULL,
+              date VARCHAR(10) NOT NULL,
+        uniq_views INTEGER,
+     uniq_contacts INTEGER,
+    uniq_favorites INTEGER,
+ PRIMARY KEY (avito_id, item_id, date)
+) WITHOUT ROWID
+"""
+
+# Дни, за которые статистика аккаунта загружена целиком и больше не запрашивается
+CREATE_ITEM_STATS_DAYS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS item_stats_days (
+    avito_id INTEGER NOT NULL,
+        date VARCHAR(10) NOT NULL,
+ PRIMARY KEY (avito_id, date)
+) WITHOUT ROWID
+"""
+
+# Колонки, которых нет в базах, созданных старыми версиями бота: (таблица, колонка, описание)
+COLUMNS_MIGRATIONS = [
+    ('tokens', 'expires_at', 'REAL'),
+]
+
+CREATE_OR_UPDATE_FEED_REVISION_SQL = """
+INSERT OR REPLACE INTO feed_revisions (title, file_id, md5_checksum, modified_time, head_revision_id)
+     VALUES (?, ?, ?, ?, ?)
+"""
+
+GET_FEED_REVISION_SQL = """
+SELECT file_id, md5_checksum, modified_time, head_revision_id
+  FROM feed_revisions
+ WHERE title = ?
+"""
+
+DELETE_FEED_REVISION_SQL = """
+DELETE FROM feed_revisions
+      WHERE title = ?
+"""
+
+BUMP_CACHE_VERSION_SQL = """
+INSERT INTO cache_versions (name, version)
+     VALUES (?, 1)
+ON CONFLICT (name) DO UPDATE SET version = version + 1
+"""
+
+GET_CACHE_VERSIONS_SQL = """
+SELECT name, version
+  FROM cache_versions
+"""
+
+GET_FSM_VALUE_SQL = """
+SELECT value
+  FROM fsm_storage
+ WHERE key = ?
+"""
+
+SET_FSM_VALUE_SQL = """
+INSERT OR REPLACE INTO fsm_storage (key, value)
+     VALUES (?, ?)
+"""
+
+DELETE_FSM_VALUE_SQL = """
+DELETE FROM fsm_storage
+      WHERE key = ?
+"""
+
+SAVE_ITEM_STATS_SQL = """
+INSERT OR REPLACE INTO item_stats (avito_id, item_id, date, uniq_views, uniq_contacts, uniq_favorites)
+     VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+GET_ITEM_STATS_SQL = """
+  SELECT item_id, date, uniq_views, uniq_contacts, uniq_favorites
+    FROM item_stats
+   WHERE avito_id = ?
+     AND date BETWEEN ? AND ?
+ORDER BY item_id, date
+"""
+
+SAVE_ITEM_STATS_DAY_SQL = """
+INSERT OR IGNORE INTO item_stats_days (avito_id, date)
+     VALUES (?, ?)
+"""
+
+GET_ITEM_STATS_DAYS_SQL = """
+SELECT date
+  FROM item_stats_days
+ WHERE avito_id = ?
+   AND date BETWEEN ? AND ?
+"""
+
+CLEAR_ITEM_STATS_SQL = """
+DELETE FROM item_stats
+"""
+
+CLEAR_ITEM_STATS_DAYS_SQL = """
+DELETE FROM item_stats_days
 """
 
 DELETE_ADMIN_SQL = """
@@ -80,53 +222,11 @@ INSERT INTO customers (
      VALUES (?, ?, ?, ?, ?, ?, ?)
 """
 
-INSERT_RECORD_TO_TOKEN_SQL = """
-INSERT INTO tokens (
-            avito_id,
-            token
-            )
-     VALUES (?, ?)
-"""
-
-GET_AVITO_ID_SQL = """
-SELECT avito_id
-  FROM customers
- WHERE title = ?
-"""
-
-GET_COMPANIES_LIST_SQL = """
-SELECT title
-  FROM customers
-"""
-
-GET_INFO_FOR_STATS_SQL = """
-SELECT avito_id, client_id, client_secret
-  FROM customers
- WHERE title = ?
-"""
-
-GET_LINKS_TO_CHATS_AND_DOC_SQL = """
-SELECT chat_with_client_link, chat_about_client_link, google_doc_link
-  FROM customers
- WHERE title = ?
-"""
-
-GET_TOKEN_SQL = """
-SELECT token
-  FROM tokens
- WHERE avito_id = ?
-"""
-
-GET_AVITO_ID_BY_COMPANY_NAME = """
-SELECT avito_id
-  FROM customers
- WHERE title = ?
-"""
-
-GET_ALL_COMPANY_INFO_SQL = """
-SELECT * 
-  FROM customers
- WHERE title = ?
+GET_ALL_COMPANIES_INFO_SQL = """
+   SELECT customers.*, tokens.token, tokens.expires_at
+     FROM customers
+LEFT JOIN tokens
+       ON tokens.avito_id = customers.avito_id
 """
 
 GET_ADMIN_IDS_LIST = """
@@ -145,159 +245,356 @@ SELECT admin_id
 """
 
 
-def create_table(sql: str):
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql)
+class ConnectionManager:
+    """
+    Одно долгоживущее соединение с базой в режиме WAL.
+    Все асинхронные обращения выполняются в отдельном потоке, чтобы не блокировать event loop.
+    """
+
+    def __init__(self, path: str, cached_statements: int = CACHED_STATEMENTS) -> None:
+        self.path = path
+        self.cached_statements = cached_statements
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False,
+                                         cached_statements=self.cached_statements)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._connection = connection
+        return self._connection
+
+    def execute_sync(self, sql: str, params: Sequence = (), foreign_keys: bool = False) -> int:
+        """Выполнит изменяющий запрос в транзакции и вернет количество затронутых строк."""
+        with self._lock:
+            connection = self.connection
+            if foreign_keys:
+                connection.execute('PRAGMA foreign_keys = ON')
+            try:
+                with connection:
+                    cursor = connection.execute(sql, params)
+                return cursor.rowcount
+            finally:
+                if foreign_keys:
+                    connection.execute('PRAGMA foreign_keys = OFF')
+
+    def executemany_sync(self, *batches: Tuple[str, Iterable[Sequence]]) -> None:
+        """Выполнит несколько пакетных запросов (запрос, наборы параметров) в одной транзакции."""
+        with self._lock:
+            with self.connection as connection:
+                for sql, seq_of_params in batches:
+                    connection.executemany(sql, seq_of_params)
+
+    def fetchone_sync(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self.connection.execute(sql, params).fetchone()
+
+    def fetchall_sync(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнит функцию в выделенном потоке базы данных."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def execute(self, sql: str, params: Sequence = (), foreign_keys: bool = False) -> int:
+        return await self.run(self.execute_sync, sql, params, foreign_keys)
+
+    async def executemany(self, *batches: Tuple[str, Iterable[Sequence]]) -> None:
+        await self.run(self.executemany_sync, *batches)
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        return await self.run(self.fetchone_sync, sql, params)
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        return await self.run(self.fetchall_sync, sql, params)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+db = ConnectionManager(PATH_TO_DB)
+
+
+class CacheVersions:
+    """
+    Сбрасывает кэши во всех процессах бота, которые работают с одной базой.
+    invalidate() сбрасывает кэш у себя и увеличивает его версию в таблице cache_versions.
+    sync() сравнивает PRAGMA data_version с прошлым значением и читает версии,
+    только если базу меняли другие соединения.
+    """
+
+    def __init__(self, manager: ConnectionManager) -> None:
+        self.manager = manager
+        self._caches: Dict[str, Tuple[CachedValue, ...]] = {}
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+
+    def register(self, name: str, *caches: CachedValue) -> None:
+        self._caches[name] = caches
+
+    def _invalidate_local(self, name: str) -> None:
+        for cache in self._caches.get(name, ()):
+            cache.invalidate()
+
+    async def invalidate(self, name: str) -> None:
+        self._invalidate_local(name)
+        await self.manager.execute(BUMP_CACHE_VERSION_SQL, (name, ))
+
+    def _changed_sync(self) -> List[str]:
+        data_version = self.manager.fetchone_sync('PRAGMA data_version')[0]
+        if data_version == self._data_version:
+            return []
+        self._data_version = data_version
+        versions = {row['name']: row['version'] for row in self.manager.fetchall_sync(GET_CACHE_VERSIONS_SQL)}
+        changed = [name for name, version in versions.items() if self._versions.get(name) != version]
+        self._versions = versions
+        return changed
+
+    async def sync(self) -> None:
+        for name in await self.manager.run(self._changed_sync):
+            self._invalidate_local(name)
+
+
+cache_versions = CacheVersions(db)
+
+
+async def create_table(sql: str):
+    await db.execute(sql)
+
+
+async def init_db() -> None:
+    """Создаст таблицы при первом запуске бота."""
+    for sql in (CREATE_COMMON_TABLE_SQL, CREATE_TOKENS_TABLE_SQL, CREATE_ADMINS_ID_TABLE_SQL,
+                CREATE_FEED_REVISIONS_TABLE_SQL, CREATE_FSM_STORAGE_TABLE_SQL, CREATE_CACHE_VERSIONS_TABLE_SQL,
+                CREATE_ITEM_STATS_TABLE_SQL, CREATE_ITEM_STATS_DAYS_TABLE_SQL):
+        await create_table(sql)
+    for table, column, definition in COLUMNS_MIGRATIONS:
+        await add_column_if_not_exists(table=table, column=column, definition=definition)
+    await cache_versions.sync()
+    await admin_ids_cache.get()
+    await in_charge_admin_ids_cache.get()
+    await companies_cache.get()
 
 
-def insert_record_to_common_table(company_name: str, avito_id: int, client_id: str = None, client_secret: str = None,
-                                  chat_with_client: str = None, chat_about_client: str = None,
-                                  google_doc_link: str = None) -> None:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        conn.execute("PRAGMA foreign_keys = ON")
-        cursor = conn.cursor()
-        cursor.execute(
-            INSERT_RECORD_TO_COMMON_SQL,
-            (company_name, avito_id, client_id, client_secret, chat_with_client, chat_about_client,
-             google_doc_link))
-
+async def add_column_if_not_exists(table: str, column: str, definition: str) -> None:
+    columns = [row['name'] for row in await db.fetchall(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        await db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
 
-def insert_record_to_tokens_table(avito_id: int, token: str) -> None:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        conn.execute("PRAGMA foreign_keys = ON")
-        cursor = conn.cursor()
-        cursor.execute(CREATE_OR_UPDATE_TOKEN, (avito_id, token))
 
+async def close_db() -> None:
+    db.close()
 
-def get_avito_id(company_name: str) -> int:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_AVITO_ID_SQL, (company_name,))
 
-    result, *_ = cursor.fetchone()
-    return result
-
-
-def get_info_for_stats(company_name: str) -> tuple:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_INFO_FOR_STATS_SQL, (company_name, ))
+async def insert_record_to_common_table(company_name: str, avito_id: int, client_id: str = None,
+                                        client_secret: str = None, chat_with_client: str = None,
+                                        chat_about_client: str = None, google_doc_link: str = None) -> None:
+    try:
+        await db.execute(
+            INSERT_RECORD_TO_COMMON_SQL,
+            (company_name, avito_id, client_id, client_secret, chat_with_client, chat_about_client, google_doc_link),
+            foreign_keys=True
+        )
+    finally:
+        await invalidate_companies_cache()
 
-    result = cursor.fetchone()
-    return result
 
+async def insert_record_to_tokens_table(avito_id: int, token: str, expires_at: Optional[float] = None) -> None:
+    await db.execute(CREATE_OR_UPDATE_TOKEN, (avito_id, token, expires_at), foreign_keys=True)
+    await invalidate_companies_cache()
 
-def get_companies_titles_list() -> List[str]:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_COMPANIES_LIST_SQL)
 
-    result = cursor.fetchall()
+async def get_companies_titles_list() -> List[str]:
+    directory = await companies_cache.get()
 
-    return [company[0] for company in result]
+    return list(directory)
 
 
-def get_token_from_tokens_table(company_name: str) -> Optional[str]:
+async def insert_admin(admin_id: int, admin_name: str, in_charge: bool = False) -> None:
     try:
-        with sqlite3.connect(PATH_TO_DB) as conn:
-            cursor = conn.cursor()
-            cursor.execute(GET_AVITO_ID_BY_COMPANY_NAME, (company_name, ))
-            avito_id, *_ = cursor.fetchone()
-            cursor.execute(GET_TOKEN_SQL, (avito_id, ))
-        result, *_ = cursor.fetchone()
-        return result
-    except TypeError as exc:
-        logger.warning(msg=f'Ошибка при получении токена из таблицы: {exc}')
-
+        await db.execute(INSERT_ADMIN_SQL, (admin_id, admin_name, in_charge))
+    finally:
+        await invalidate_admins_cache()
 
-def insert_admin(admin_id: int, admin_name: str, in_charge: bool = False) -> None:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(INSERT_ADMIN_SQL, (admin_id, admin_name, in_charge))
 
-
-def get_admin_names() -> List[str]:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_ADMIN_NAMES_LIST_SQL)
-    result = cursor.fetchall()
+async def get_admin_names() -> List[str]:
+    result = await db.fetchall(GET_ADMIN_NAMES_LIST_SQL)
 
     return [admin[0] for admin in result]
 
 
-def delete_company(company_name: str) -> None:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(DELETE_COMPANY_SQL, (company_name, ))
+async def delete_company(company_name: str) -> None:
+    await db.execute(DELETE_COMPANY_SQL, (company_name, ))
+    # Клиент, добавленный заново под тем же названием, должен загрузить фид с нуля
+    await delete_feed_revision(title=company_name)
+    await invalidate_companies_cache()
 
 
-def delete_admin_with_id(admin_id: int) -> None:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(DELETE_ADMIN_SQL, (admin_id, ))
+async def delete_admin_with_id(admin_id: int) -> None:
+    await db.execute(DELETE_ADMIN_SQL, (admin_id, ))
+    await invalidate_admins_cache()
 
 
-def delete_admin_with_name(admin_name: str) -> bool:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(DELETE_ADMIN_WITH_NAME_SQL, (admin_name, ))
-        rows_deleted = cursor.rowcount
-        if rows_deleted > 0:
-            return True
-        return False
+async def delete_admin_with_name(admin_name: str) -> bool:
+    rows_deleted = await db.execute(DELETE_ADMIN_WITH_NAME_SQL, (admin_name, ))
+    await invalidate_admins_cache()
+    if rows_deleted > 0:
+        return True
+    return False
 
 
-def delete_record_from_customers_with_condition(title: str, avito_id: str, client_id) -> bool:
+async def delete_record_from_customers_with_condition(title: str, avito_id: str, client_id) -> bool:
     values_tuple: tuple = (title, avito_id, avito_id, client_id, client_id, title)
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(DELETE_RECORD_FROM_CUSTOMERS_SQL, values_tuple)
+    rows_deleted = await db.execute(DELETE_RECORD_FROM_CUSTOMERS_SQL, values_tuple)
+    await invalidate_companies_cache()
 
-    if cursor.rowcount > 0:
+    if rows_deleted > 0:
         return True
     return False
 
 
-def get_admin_ids() -> List[int]:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_ADMIN_IDS_LIST)
-    result = cursor.fetchall()
+async def get_admin_ids() -> List[int]:
+    result = await db.fetchall(GET_ADMIN_IDS_LIST)
     return [admin_id[0] for admin_id in result]
 
 
-def get_in_charge_admin_ids() -> List[int]:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_IN_CHARGE_ADMIN_IDS_LIST_SQL)
-    result = cursor.fetchall()
+async def get_in_charge_admin_ids() -> List[int]:
+    result = await db.fetchall(GET_IN_CHARGE_ADMIN_IDS_LIST_SQL)
     return [admin_id[0] for admin_id in result]
 
 
-def get_all_info_about_company(title: str) -> Optional[Dict]:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(GET_ALL_COMPANY_INFO_SQL, (title, ))
+async def _load_admin_ids_set() -> FrozenSet[int]:
+    return frozenset(await get_admin_ids())
+
+
+async def _load_in_charge_admin_ids_set() -> FrozenSet[int]:
+    return frozenset(await get_in_charge_admin_ids())
+
+
+admin_ids_cache: CachedValue[FrozenSet[int]] = CachedValue(loader=_load_admin_ids_set, ttl=AUTH_CACHE_TTL)
+in_charge_admin_ids_cache: CachedValue[FrozenSet[int]] = CachedValue(
+    loader=_load_in_charge_admin_ids_set, ttl=AUTH_CACHE_TTL
+)
+
+
+async def _load_admin_names() -> Tuple[str, ...]:
+    return tuple(await get_admin_names())
+
+
+admin_names_cache: CachedValue[Tuple[str, ...]] = CachedValue(loader=_load_admin_names, ttl=AUTH_CACHE_TTL)
+cache_versions.register('admins', admin_ids_cache, in_charge_admin_ids_cache, admin_names_cache)
+
 
-    result = cursor.fetchone()
+async def invalidate_admins_cache() -> None:
+    await cache_versions.invalidate('admins')
+
+
+async def is_admin_id(telegram_id: int) -> bool:
+    """Проверит по кэшу, есть ли пользователь в таблице админов."""
+    return telegram_id in await admin_ids_cache.get()
+
+
+async def is_in_charge_admin_id(telegram_id: int) -> bool:
+    """Проверит по кэшу, является ли пользователь главным админом."""
+    return telegram_id in await in_charge_admin_ids_cache.get()
+
+
+async def _load_companies_directory() -> Dict[str, Dict]:
+    result = await db.fetchall(GET_ALL_COMPANIES_INFO_SQL)
+    return {row['title']: dict(row) for row in result}
+
+
+companies_cache: CachedValue[Dict[str, Dict]] = CachedValue(
+    loader=_load_companies_directory, ttl=COMPANIES_CACHE_TTL
+)
+cache_versions.register('companies', companies_cache)
+
+
+async def invalidate_companies_cache() -> None:
+    await cache_versions.invalidate('companies')
+
+
+async def get_all_companies_info() -> Dict[str, Dict]:
+    """Вернет копию справочника клиентов: название -> строка customers вместе с токеном."""
+    return {title: dict(row) for title, row in (await companies_cache.get()).items()}
+
+
+async def get_all_info_about_company(title: str) -> Optional[Dict]:
+    directory = await companies_cache.get()
+    result = directory.get(title)
     if result:
-        try:
-            data = dict(result)
-            return data
-        except Exception as exc:
-            logger.warning(msg=f'Ошибка при получении информации о компании из таблицы: {exc}')
-            return None
+        return dict(result)
+
+
+async def get_feed_revision(title: str) -> Optional[Dict]:
+    """Вернет сведения о версии файла Google Drive, из которой последний раз обновлялся фид клиента."""
+    result = await db.fetchone(GET_FEED_REVISION_SQL, (title, ))
+    return dict(result) if result else None
+
+
+async def save_feed_revision(title: str, file_id: str, md5_checksum: Optional[str], modified_time: Optional[str],
+                             head_revision_id: Optional[str]) -> None:
+    await db.execute(CREATE_OR_UPDATE_FEED_REVISION_SQL,
+                     (title, file_id, md5_checksum, modified_time, head_revision_id))
+
+
+async def delete_feed_revision(title: str) -> None:
+    await db.execute(DELETE_FEED_REVISION_SQL, (title, ))
+
+
+async def get_fsm_value(key: str) -> Optional[str]:
+    result = await db.fetchone(GET_FSM_VALUE_SQL, (key, ))
+    return result['value'] if result else None
+
+
+async def set_fsm_value(key: str, value: Optional[str]) -> None:
+    """Сохранит значение по ключу, None удалит ключ."""
+    if value is None:
+        await db.execute(DELETE_FSM_VALUE_SQL, (key, ))
+    else:
+        await db.execute(SET_FSM_VALUE_SQL, (key, value))
+
+
+async def get_item_stats_days(avito_id: int, date_from: str, date_to: str) -> Set[str]:
+    """Вернет дни периода, статистика за которые уже целиком лежит в базе."""
+    result = await db.fetchall(GET_ITEM_STATS_DAYS_SQL, (avito_id, date_from, date_to))
+    return {row['date'] for row in result}
+
+
+async def save_item_stats(avito_id: int, rows: Iterable[Sequence], days: Iterable[str]) -> None:
+    """
+    Сохранит строки статистики (item_id, date, uniq_views, uniq_contacts, uniq_favorites)
+    и отметит дни days загруженными. Все пишется одной транзакцией.
+    """
+    await db.executemany(
+        (SAVE_ITEM_STATS_SQL, [(avito_id, *row) for row in rows]),
+        (SAVE_ITEM_STATS_DAY_SQL, [(avito_id, day) for day in days])
+    )
+
 
+async def get_item_stats(avito_id: int, date_from: str, date_to: str) -> List[sqlite3.Row]:
+    """Вернет дневную статистику аккаунта за период, упорядоченную по объявлению и дате."""
+    return await db.fetchall(GET_ITEM_STATS_SQL, (avito_id, date_from, date_to))
 
-def get_links_to_chats(title: str) -> List:
-    with sqlite3.connect(PATH_TO_DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute(GET_LINKS_TO_CHATS_AND_DOC_SQL, (title,))
 
-    result = list(cursor.fetchone())
-    return result
+async def clear_item_stats() -> None:
+    """Удалит всю сохраненную статистику: следующий запрос снова пойдет в Авито."""
+    await db.executemany((CLEAR_ITEM_STATS_SQL, [()]), (CLEAR_ITEM_STATS_DAYS_SQL, [()]))
 
 
 if __name__ == '__main__':
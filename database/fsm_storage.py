@@ -0,0 +1,64 @@
+import json
+from typing import Any, Dict, Literal, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey, DEFAULT_DESTINY
+
+from database.db import get_fsm_value, set_fsm_value
+from log_settings.logger_init import logger
+
+
+FSM_KEY_PREFIX = 'fsm'
+
+
+def build_key(key: StorageKey, part: Literal['data', 'state']) -> str:
+    """Ключ в том же виде, что строит DefaultKeyBuilder aiogram для RedisStorage."""
+    parts = [FSM_KEY_PREFIX, str(key.chat_id)]
+    if key.thread_id:
+        parts.append(str(key.thread_id))
+    parts.append(str(key.user_id))
+    if key.destiny != DEFAULT_DESTINY:
+        parts.append(key.destiny)
+    parts.append(part)
+    return ':'.join(parts)
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранит состояния и данные FSM в таблице fsm_storage основной базы.
+    Переживает перезапуск бота и общая для всех процессов, которые работают с этой базой.
+    Данные хранятся в JSON, поэтому в них можно класть только простые значения.
+    """
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        await set_fsm_value(key=build_key(key, 'state'), value=state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await get_fsm_value(key=build_key(key, 'state'))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await set_fsm_value(key=build_key(key, 'data'), value=json.dumps(data, ensure_ascii=False) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        value = await get_fsm_value(key=build_key(key, 'data'))
+        return json.loads(value) if value else {}
+
+    async def close(self) -> None:
+        # Соединение с базой закрывает close_db
+        pass
+
+
+def create_fsm_storage(redis_url: Optional[str] = None) -> BaseStorage:
+    """Вернет RedisStorage, если задан адрес Redis, иначе хранилище в SQLite."""
+    if redis_url:
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        logger.info(msg='Состояния FSM хранятся в Redis')
+        return RedisStorage.from_url(redis_url)
+    return SQLiteStorage()
+
+
+if __name__ == '__main__':
+    pass
@@ -1,92 +1,268 @@
-import io
+import asyncio
 import os.path
-from typing import List, Optional
-from queue import Queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
+import httplib2
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, Resource
 from googleapiclient.http import MediaIoBaseDownload
 from google.auth.transport.requests import Request
 
+from database.db import get_feed_revision, save_feed_revision
 from log_settings.logger_init import logger
-from bot_api.settings import folder
+from bot_api.settings import folder, feed_sync
 
 
 API_NAME = 'drive'
 API_VERSION = 'v3'
 SCOPES = ['https://www.googleapis.com/auth/drive']
-TARGET_FOLDER_NAME = folder
+TARGET_FOLDER_NAME = folder.folder.get_secret_value() if folder.folder else None
 MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 JSON_FILE = os.path.abspath(os.path.join('project-for-exhibition-bot-54bcd9716d4c.json'))
+# Размер части файла при скачивании и сколько частей может ждать отправки на сервер
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+STREAM_QUEUE_SIZE = 4
+# Метаданные, по которым понятно, менялся ли файл с прошлого обновления фида
+FILE_FIELDS = 'nextPageToken, files(id, name, md5Checksum, modifiedTime, headRevisionId)'
+FEED_NOT_CHANGED = 'Файл {file_name} не менялся с прошлого обновления, фид актуален.'
 
-result_queue = Queue()
+# Учетные данные и клиент Drive создаются один раз на процесс.
+# httplib2 внутри клиента не потокобезопасен, поэтому поиск файлов идет в одном выделенном потоке.
+# Каждое скачивание идет в своем потоке со своим соединением, чтобы фиды обновлялись параллельно.
+_credentials: Optional[service_account.Credentials] = None
+_service: Optional[Resource] = None
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_download_executor: Optional[ThreadPoolExecutor] = None
 
 
 def authenticate_google_drive_api():
-    credentials = service_account.Credentials.from_service_account_file(
-        filename=JSON_FILE,
-        scopes=SCOPES,
-    )
+    """Вернет учетные данные сервисного аккаунта: файл читается один раз, токен обновляется по истечении."""
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            _credentials = service_account.Credentials.from_service_account_file(
+                filename=JSON_FILE,
+                scopes=SCOPES,
+            )
+
+        if not _credentials.valid:
+            _credentials.refresh(Request())
+
+        return _credentials
+
+
+def get_drive_service(credentials=None) -> Resource:
+    """Вернет клиент Drive API. Описание API берется из документа, поставляемого с библиотекой."""
+    global _service
+    with _lock:
+        if _service is None:
+            _service = build(API_NAME, API_VERSION, credentials=credentials or _credentials,
+                             cache_discovery=False, static_discovery=True)
+        return _service
 
-    if credentials.expired:
-        credentials.refresh(Request())
 
-    return credentials
+def reset_drive_client() -> None:
+    """Забудет учетные данные и клиент, следующий вызов создаст их заново."""
+    global _credentials, _service
+    with _lock:
+        _credentials = None
+        _service = None
 
 
 def get_drive_file_by_name(credentials, target_folder_name, file_name) -> Optional[List]:
 
-    service = build(API_NAME, API_VERSION, credentials=credentials)
+    service = get_drive_service(credentials=credentials)
     query = f"name contains '{file_name}' and '{target_folder_name}' in parents"
-    results = service.files().list(q=query, fields="nextPageToken, files(id, name)").execute()
+    results = service.files().list(q=query, fields=FILE_FIELDS).execute()
     file = results.get('files', [])
 
     return file if file else None
 
 
-def get_file_content(credentials, file: dict):
-    service = build(API_NAME, API_VERSION, credentials=credentials)
+class ChunkWriter:
+    """Файлоподобный объект для MediaIoBaseDownload: вместо накопления в памяти отдает каждую часть в put."""
+
+    def __init__(self, put: Callable[[bytes], None]) -> None:
+        self.put = put
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.put(bytes(data))
+        self.written += len(data)
+        return len(data)
+
+
+class DownloadCancelled(Exception):
+    """Получатель перестал читать файл, скачивание нужно прервать."""
+
+
+def download_file_to(file: dict, file_stream: ChunkWriter) -> None:
+    """Скачает файл в file_stream через собственное соединение: общий клиент Drive в это время свободен."""
+    service = get_drive_service()
+    http = AuthorizedHttp(authenticate_google_drive_api(), http=httplib2.Http())
     try:
         request = service.files().get_media(fileId=file.get('id'))
-        file_stream = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_stream, request)
+        request.http = http
+        downloader = MediaIoBaseDownload(file_stream, request, chunksize=DOWNLOAD_CHUNK_SIZE)
         done = False
         while done is False:
             status, done = downloader.next_chunk()
-        file_content = file_stream.getvalue()
-        return file_content
 
+    except DownloadCancelled:
+        raise
     except Exception as exc:
         logger.warning(msg=f'Файл нельзя загрузить методом get_media: {exc}')
-        if 'fileNotDownloadable' in str(exc):
-            try:
-                request = service.files().export_media(
-                    fileId=file.get('id'),
-                    mimeType=MIME_TYPE)
-                file_stream = io.BytesIO()
-                downloader = MediaIoBaseDownload(file_stream, request)
-                done = False
-                while done is False:
-                    status, done = downloader.next_chunk()
-                file_content = file_stream.getvalue()
-                return file_content
-            except Exception as exc:
-                logger.warning(msg=f'Ошибка при использовании export_media для файла {file.get("name")}: {str(exc)}')
-
-
-def run_file_updating(file_name: str) -> Optional[bytes]:
+        if 'fileNotDownloadable' not in str(exc) or file_stream.written:
+            raise
+        try:
+            request = service.files().export_media(
+                fileId=file.get('id'),
+                mimeType=MIME_TYPE)
+            request.http = http
+            downloader = MediaIoBaseDownload(file_stream, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk()
+        except DownloadCancelled:
+            raise
+        except Exception as exc:
+            logger.warning(msg=f'Ошибка при использовании export_media для файла {file.get("name")}: {str(exc)}')
+            raise
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='google_drive')
+    return _executor
+
+
+def get_download_executor() -> ThreadPoolExecutor:
+    """
+    Потоки для скачивания файлов. Поток занят, пока получатель не прочитает весь файл,
+    поэтому их столько же, сколько фидов обновляется одновременно.
+    """
+    global _download_executor
+    if _download_executor is None:
+        _download_executor = ThreadPoolExecutor(max_workers=max(1, int(feed_sync.feed_sync_concurrency)),
+                                                thread_name_prefix='google_drive_download')
+    return _download_executor
+
+
+def find_file(file_name: str) -> Optional[dict]:
     credentials = authenticate_google_drive_api()
 
     file = get_drive_file_by_name(
         credentials=credentials, target_folder_name=TARGET_FOLDER_NAME, file_name=file_name
     )
+    return file[0] if file else None
 
-    if file:
-        file_content = get_file_content(credentials=credentials, file=file[0])
-        return file_content
-    else:
+
+async def iter_file_chunks(file: dict) -> AsyncIterator[bytes]:
+    """
+    Отдаст содержимое файла по частям по мере скачивания.
+    Скачивание идет в отдельном потоке, между ним и получателем не больше STREAM_QUEUE_SIZE частей,
+    поэтому в памяти одновременно находится лишь несколько частей файла.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def put(item) -> None:
+        if cancelled.is_set():
+            raise DownloadCancelled()
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def download() -> None:
+        try:
+            download_file_to(file=file, file_stream=ChunkWriter(put=put))
+            put(None)
+        except DownloadCancelled:
+            pass
+        except Exception as exc:
+            if not cancelled.is_set():
+                put(exc)
+
+    started = time.perf_counter()
+    future = loop.run_in_executor(get_download_executor(), download)
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+        logger.info(msg=f'Файл {file.get("name")} передан из Google Drive за {time.perf_counter() - started:.2f} с')
+    finally:
+        cancelled.set()
+        while not queue.empty():
+            queue.get_nowait()
+        await future
+
+
+def get_file_revision(file: dict) -> Dict:
+    return {
+        'file_id': file.get('id'),
+        'md5_checksum': file.get('md5Checksum'),
+        'modified_time': file.get('modifiedTime'),
+        'head_revision_id': file.get('headRevisionId')
+    }
+
+
+def is_same_revision(file_revision: Dict, saved_revision: Optional[Dict]) -> bool:
+    """У таблиц Google нет md5 и номера ревизии, для них сравнивается только время изменения."""
+    if not saved_revision or not any(value for key, value in file_revision.items() if key != 'file_id'):
+        return False
+    return file_revision == saved_revision
+
+
+async def run_file_updating(file_name: str, upload: Callable[[AsyncIterator[bytes]], Awaitable[Tuple[bool, str]]]) \
+        -> Optional[str]:
+    """
+    Найдет файл клиента в Google Drive и передаст его в upload потоком частей:
+    отправка на сервер идет одновременно со скачиванием.
+    Если файл не менялся с прошлого успешного обновления, ничего не скачивается и не отправляется.
+    upload возвращает признак успеха и текст для пользователя.
+    Вернет текст результата, либо None, если файла нет.
+    """
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    file = await loop.run_in_executor(get_executor(), find_file, file_name)
+    if not file:
         return None
 
+    file_revision = get_file_revision(file=file)
+    if is_same_revision(file_revision=file_revision, saved_revision=await get_feed_revision(title=file_name)):
+        logger.info(msg=f'Файл {file_name} не менялся, обновление фида пропущено')
+        return FEED_NOT_CHANGED.format(file_name=file_name)
+
+    chunks = iter_file_chunks(file=file)
+    try:
+        is_success, result = await upload(chunks)
+    finally:
+        # Если upload прочитал не весь файл, скачивание прерывается сразу, а не при сборке мусора
+        await chunks.aclose()
+    if is_success:
+        await save_feed_revision(title=file_name, **file_revision)
+    logger.info(msg=f'Фид {file_name} обновлен из Google Drive за {time.perf_counter() - started:.2f} с')
+    return result
+
+
+def close_drive_client() -> None:
+    global _executor, _download_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    if _download_executor is not None:
+        _download_executor.shutdown(wait=False)
+        _download_executor = None
+
 
 if __name__ == '__main__':
     authenticate_google_drive_api()
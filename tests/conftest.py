@@ -0,0 +1,7 @@
+import os
+
+
+# Настройки бота читаются при импорте модулей, для тестов хватает заглушек
+os.environ.setdefault('BOT_TOKEN', '1:test')
+os.environ.setdefault('URL', 'http://localhost/')
+os.environ.setdefault('TARGET_FOLDER_NAME', 'test')
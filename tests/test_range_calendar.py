@@ -0,0 +1,87 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.utils.callback_answer import CallbackAnswer
+
+from changed_calendar.range_calendar import START_FORMAT, RangeCalendar
+from changed_calendar.schemas import RangeCalAct, RangeCalendarCallback
+
+
+def make_query() -> MagicMock:
+    query = MagicMock()
+    query.answer = AsyncMock()
+    query.message.edit_reply_markup = AsyncMock()
+    return query
+
+
+def process(calendar: RangeCalendar, data: RangeCalendarCallback, query=None, callback_answer=None):
+    query = query or make_query()
+    return asyncio.run(calendar.process_selection(query, data, callback_answer)), query
+
+
+def midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def test_first_day_marks_start_and_edits_keyboard():
+    (selected, dates), query = process(
+        RangeCalendar(), RangeCalendarCallback(act=RangeCalAct.day, year=2024, month=1, day=10)
+    )
+    assert (selected, dates) == (False, None)
+    query.message.edit_reply_markup.assert_awaited_once()
+
+
+def test_second_day_returns_sorted_range():
+    data = RangeCalendarCallback(act=RangeCalAct.day, year=2024, month=1, day=5,
+                                 start=datetime(2024, 1, 10).strftime(START_FORMAT))
+    (selected, dates), query = process(RangeCalendar(), data)
+    assert selected
+    assert dates == (datetime(2024, 1, 5), datetime(2024, 1, 10))
+    query.message.edit_reply_markup.assert_not_awaited()
+
+
+def test_preset_selects_last_days_up_to_today():
+    (selected, dates), _ = process(RangeCalendar(), RangeCalendarCallback(act=RangeCalAct.preset, days=7))
+    today = midnight(date.today())
+    assert selected
+    assert dates == (today - timedelta(days=6), today)
+
+
+def test_preset_is_clipped_to_dates_range():
+    calendar = RangeCalendar()
+    max_date = midnight(date.today() - timedelta(days=3))
+    min_date = midnight(date.today() - timedelta(days=5))
+    calendar.set_dates_range(min_date, max_date)
+    (selected, dates), _ = process(calendar, RangeCalendarCallback(act=RangeCalAct.preset, days=30))
+    assert dates == (min_date, max_date)
+
+
+def test_day_out_of_range_is_rejected_through_callback_answer():
+    calendar = RangeCalendar()
+    calendar.set_dates_range(datetime(2024, 1, 1), datetime(2024, 12, 31))
+    callback_answer = CallbackAnswer(answered=False)
+    (selected, dates), query = process(
+        calendar, RangeCalendarCallback(act=RangeCalAct.day, year=2025, month=1, day=1),
+        callback_answer=callback_answer
+    )
+    assert (selected, dates) == (False, None)
+    assert callback_answer.text
+    # Отвечает только CallbackAnswerMiddleware, второй ответ Telegram отклонил бы
+    query.answer.assert_not_awaited()
+
+
+def test_ignore_without_callback_answer_answers_query():
+    (selected, dates), query = process(RangeCalendar(), RangeCalendarCallback(act=RangeCalAct.ignore))
+    assert (selected, dates) == (False, None)
+    query.answer.assert_awaited_once()
+
+
+def test_navigation_keeps_selected_start():
+    data = RangeCalendarCallback(act=RangeCalAct.next_m, year=2024, month=1, day=1,
+                                 start=datetime(2024, 1, 10).strftime(START_FORMAT))
+    (selected, _), query = process(RangeCalendar(), data)
+    assert not selected
+    markup = query.message.edit_reply_markup.await_args.kwargs['reply_markup']
+    callbacks = [button.callback_data for row in markup.inline_keyboard for button in row]
+    assert any('20240110' in callback for callback in callbacks)
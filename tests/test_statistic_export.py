@@ -0,0 +1,66 @@
+import io
+
+import openpyxl
+
+from bot_api.statistic_export import (SHEET_TITLE_MAX_LENGTH, STATISTIC_COLUMNS, SUMMARY_COLUMNS, SUMMARY_TOTAL,
+                                      SUMMED_STATISTIC_COLUMNS, create_statistic_workbook, make_sheet_title)
+
+
+DATA = [
+    {'itemId': 1, 'stats': [
+        {'date': '2024-01-01', 'uniqViews': 10, 'uniqContacts': 1, 'uniqFavorites': 2},
+        {'date': '2024-01-02', 'uniqViews': 10, 'uniqContacts': 3, 'uniqFavorites': 0},
+    ]},
+    {'itemId': 2, 'stats': [
+        {'date': '2024-01-01', 'uniqViews': 0, 'uniqContacts': 0, 'uniqFavorites': 0},
+    ]},
+]
+
+
+def load(content: bytes) -> openpyxl.Workbook:
+    return openpyxl.load_workbook(io.BytesIO(content))
+
+
+def sheet_rows(sheet) -> list:
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+def test_make_sheet_title_replaces_forbidden_chars_and_cuts_length():
+    title = make_sheet_title('a/b:c' + 'x' * 40, set())
+    assert title.startswith('a_b_c')
+    assert len(title) == SHEET_TITLE_MAX_LENGTH
+
+
+def test_make_sheet_title_keeps_titles_unique_ignoring_case():
+    used = set()
+    assert make_sheet_title('Клиент', used) == 'Клиент'
+    assert make_sheet_title('клиент', used) == 'клиент (1)'
+    assert make_sheet_title('Клиент', used) == 'Клиент (2)'
+    assert make_sheet_title('', used) == 'Лист'
+
+
+def test_workbook_has_summary_and_statistic_sheets():
+    workbook = load(create_statistic_workbook(sheets={'Клиент': DATA, 'Пусто': []}))
+    # Клиенту без статистики сводка не нужна
+    assert workbook.sheetnames == ['Сводка Клиент', 'Клиент', 'Пусто']
+
+    rows = sheet_rows(workbook['Клиент'])
+    assert rows[0] == STATISTIC_COLUMNS
+    assert rows[1] == [1, '2024-01-01', 1, 2, 10]
+    # Номер объявления только в первой строке его блока
+    assert rows[2] == [None, '2024-01-02', 3, 0, 10]
+
+
+def test_summary_totals_conversions_and_top():
+    rows = sheet_rows(load(create_statistic_workbook(sheets={'Клиент': DATA}))['Сводка Клиент'])
+    header = rows.index(SUMMARY_COLUMNS + [None])
+    assert rows[header + 1] == [SUMMARY_TOTAL, 20, 4, 2, 20.0, 10.0, None]
+    top = [row for row in rows if isinstance(row[0], int) and row[1] in (1, 2)]
+    assert top[0] == [1, 1, 20, 4, 2, 20.0, 10.0]
+    # Без просмотров конверсия нулевая, а не ошибка деления
+    assert rows[-1] == [2, 0, 0, 0, 0, 0, None]
+
+
+def test_summed_uniques_change_column_titles():
+    workbook = load(create_statistic_workbook(sheets={'Клиент': DATA}, summed_uniques=True))
+    assert sheet_rows(workbook['Клиент'])[0] == SUMMED_STATISTIC_COLUMNS
@@ -0,0 +1,57 @@
+from avito_api.stats_aggregation import aggregate_daily_rows, rows_to_items
+
+
+ROWS = [
+    (1, '2024-01-31', 1, 0, 2),
+    (1, '2024-02-01', 2, 1, 0),
+    (1, '2024-02-05', 4, 2, 1),
+    (2, '2024-02-01', 10, 5, None),
+]
+
+
+def stats_of(items, item_id):
+    return next(item['stats'] for item in items if item['itemId'] == item_id)
+
+
+def test_rows_to_items_keeps_avito_format():
+    items = rows_to_items(ROWS[:2])
+    assert items == [{'itemId': 1, 'stats': [
+        {'date': '2024-01-31', 'uniqViews': 1, 'uniqContacts': 0, 'uniqFavorites': 2},
+        {'date': '2024-02-01', 'uniqViews': 2, 'uniqContacts': 1, 'uniqFavorites': 0},
+    ]}]
+
+
+def test_rows_to_items_groups_rows_that_are_not_adjacent():
+    items = rows_to_items([ROWS[0], ROWS[3], ROWS[1]])
+    assert [item['itemId'] for item in items] == [1, 2]
+    assert [entry['date'] for entry in stats_of(items, 1)] == ['2024-01-31', '2024-02-01']
+
+
+def test_aggregate_by_week_starts_on_monday():
+    items = aggregate_daily_rows(rows=ROWS, period='week')
+    # 2024-01-31 и 2024-02-01 - одна неделя с понедельника 2024-01-29, 2024-02-05 - следующая
+    assert stats_of(items, 1) == [
+        {'date': '2024-01-29', 'uniqViews': 3, 'uniqContacts': 1, 'uniqFavorites': 2},
+        {'date': '2024-02-05', 'uniqViews': 4, 'uniqContacts': 2, 'uniqFavorites': 1},
+    ]
+
+
+def test_aggregate_by_month_and_year():
+    months = aggregate_daily_rows(rows=ROWS, period='month')
+    assert [entry['date'] for entry in stats_of(months, 1)] == ['2024-01-01', '2024-02-01']
+    assert stats_of(months, 1)[1]['uniqViews'] == 6
+
+    years = aggregate_daily_rows(rows=ROWS, period='year')
+    assert stats_of(years, 1) == [{'date': '2024-01-01', 'uniqViews': 7, 'uniqContacts': 3, 'uniqFavorites': 3}]
+
+
+def test_aggregate_treats_missing_values_as_zero_and_returns_ints():
+    items = aggregate_daily_rows(rows=ROWS, period='month')
+    entry = stats_of(items, 2)[0]
+    assert entry['uniqFavorites'] == 0
+    assert all(type(entry[field]) is int for field in ('uniqViews', 'uniqContacts', 'uniqFavorites'))
+    assert type(items[0]['itemId']) is int
+
+
+def test_aggregate_empty_rows():
+    assert aggregate_daily_rows(rows=[], period='week') == []
@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+from avito_api.avito import find_missing_ranges, iter_finished_days
+
+
+def test_find_missing_ranges_without_loaded_days():
+    assert find_missing_ranges(date(2024, 1, 1), date(2024, 1, 3), set()) == [(date(2024, 1, 1), date(2024, 1, 3))]
+
+
+def test_find_missing_ranges_splits_around_loaded_days():
+    loaded = {'2024-01-02', '2024-01-03', '2024-01-06'}
+    assert find_missing_ranges(date(2024, 1, 1), date(2024, 1, 7), loaded) == [
+        (date(2024, 1, 1), date(2024, 1, 1)),
+        (date(2024, 1, 4), date(2024, 1, 5)),
+        (date(2024, 1, 7), date(2024, 1, 7)),
+    ]
+
+
+def test_find_missing_ranges_when_everything_is_loaded():
+    loaded = {'2024-01-01', '2024-01-02'}
+    assert find_missing_ranges(date(2024, 1, 1), date(2024, 1, 2), loaded) == []
+
+
+def test_iter_finished_days_lists_every_day_of_past_ranges():
+    ranges = [(date(2024, 1, 1), date(2024, 1, 2)), (date(2024, 1, 5), date(2024, 1, 5))]
+    assert list(iter_finished_days(ranges)) == ['2024-01-01', '2024-01-02', '2024-01-05']
+
+
+def test_iter_finished_days_never_includes_today_or_future():
+    today = date.today()
+    ranges = [(today - timedelta(days=2), today + timedelta(days=2))]
+    assert list(iter_finished_days(ranges)) == [
+        (today - timedelta(days=2)).isoformat(),
+        (today - timedelta(days=1)).isoformat(),
+    ]
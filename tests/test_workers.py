@@ -0,0 +1,20 @@
+from bot_api.workers import get_chat_id
+
+
+def test_get_chat_id_from_message():
+    update = {'update_id': 1, 'message': {'chat': {'id': 42}, 'from': {'id': 7}}}
+    assert get_chat_id(update) == 42
+
+
+def test_get_chat_id_from_callback_query_message():
+    update = {'update_id': 1, 'callback_query': {'from': {'id': 7}, 'message': {'chat': {'id': 42}}}}
+    assert get_chat_id(update) == 42
+
+
+def test_get_chat_id_falls_back_to_user():
+    update = {'update_id': 1, 'inline_query': {'from': {'id': 7}, 'query': ''}}
+    assert get_chat_id(update) == 7
+
+
+def test_get_chat_id_without_chat_and_user():
+    assert get_chat_id({'update_id': 1}) == 0